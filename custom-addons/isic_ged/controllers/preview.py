@@ -2,7 +2,6 @@ import base64
 import re
 
 from odoo import http
-from odoo.exceptions import AccessError
 from odoo.http import request
 
 
@@ -24,12 +23,10 @@ class IsicGedPreview(http.Controller):
         if not dms_file.exists():
             return request.not_found()
 
-        try:
-            dms_file.check_access("read")
-            dms_file.check_access_rule("read")
-        except AccessError:
+        if not dms_file._get_permission_matrix()[dms_file.id]["read"]:
             return request.not_found()
 
+        dms_file._touch_last_access()
         content = dms_file.content
         if not content:
             return request.not_found()
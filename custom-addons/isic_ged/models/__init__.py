@@ -1 +1,9 @@
-from . import dms_directory, dms_file, isic_classification_rule, isic_document_type, isic_document_version
+from . import (
+    dms_directory,
+    dms_file,
+    dms_storage,
+    ir_attachment,
+    isic_classification_rule,
+    isic_document_type,
+    isic_document_version,
+)
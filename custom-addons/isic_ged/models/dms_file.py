@@ -269,6 +269,16 @@ class DmsFile(models.Model):
             if len(versions) > max_versions:
                 versions[max_versions:].unlink()
 
+    @api.model
+    def _verify_contents(self, domain=None, batch_size=500, max_workers=None):
+        """Vérifie aussi le contenu des versions lors d'un contrôle complet."""
+        mismatches = super()._verify_contents(domain=domain, batch_size=batch_size, max_workers=max_workers)
+        if domain is None:
+            mismatches += self.env["isic.document.version"]._verify_contents(
+                batch_size=batch_size, max_workers=max_workers
+            )
+        return mismatches
+
     def action_restore_version(self):
         """Restore a previous version. Called from version list button.
 
@@ -0,0 +1,18 @@
+from odoo import models
+from odoo.osv.expression import AND
+
+
+class DmsStorage(models.Model):
+    _inherit = "dms.storage"
+
+    def _get_cold_policies(self):
+        """Les types de document avec leur propre délai remplacent celui du stockage."""
+        policies = super()._get_cold_policies()
+        doc_types = (
+            self.env["isic.document.type"].with_context(active_test=False).search([("cold_after_days", "!=", 0)])
+        )
+        if not doc_types:
+            return policies
+        policies = [(AND([domain, [("document_type_id", "not in", doc_types.ids)]]), days) for domain, days in policies]
+        policies += [([("document_type_id", "=", doc_type.id)], doc_type.cold_after_days) for doc_type in doc_types]
+        return policies
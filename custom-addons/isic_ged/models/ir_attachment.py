@@ -0,0 +1,10 @@
+from odoo import api, models
+
+
+class IrAttachment(models.Model):
+    _inherit = "ir.attachment"
+
+    @api.model
+    def _get_dms_orphan_models(self):
+        # Versions removed with their file by the database cascade leave their content behind
+        return [*super()._get_dms_orphan_models(), "isic.document.version"]
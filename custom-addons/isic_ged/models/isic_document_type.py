@@ -19,6 +19,11 @@ class IsicDocumentType(models.Model):
         string="Conservation (jours)",
         help="Durée de conservation en jours. 0 = illimitée.",
     )
+    cold_after_days = fields.Integer(
+        string="Archivage froid (jours)",
+        help="Délai sans consultation après lequel le contenu est déplacé vers le stockage froid. "
+        "0 = délai du stockage, négatif = jamais.",
+    )
     sequence = fields.Integer(default=10)
 
     _unique_code = models.Constraint(
@@ -1,4 +1,5 @@
 from odoo import api, fields, models
+from odoo.addons.dms.tools.integrity import sha1_sources
 from odoo.tools import human_size
 
 
@@ -84,3 +85,46 @@ class IsicDocumentVersion(models.Model):
         """Restore this version's content to the parent file."""
         self.ensure_one()
         self.file_id.with_context(restore_version_id=self.id).action_restore_version()
+
+    @api.model
+    def _verify_contents(self, batch_size=500, max_workers=None):
+        """Vérifie que le contenu des versions correspond toujours à leur checksum.
+
+        Voir ``dms.file._verify_contents``.
+        """
+        versions = self.sudo().with_context(bin_size=False)
+        attachment_model = self.env["ir.attachment"].sudo()
+        mismatches = []
+        last_id = 0
+        while True:
+            batch = versions.search_fetch(
+                [("checksum", "!=", False), ("id", ">", last_id)],
+                ["checksum", "name"],
+                order="id",
+                limit=batch_size,
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            attachments = attachment_model.search(
+                [("res_model", "=", self._name), ("res_field", "=", "content"), ("res_id", "in", batch.ids)]
+            )
+            sources = dict.fromkeys(batch.ids, b"")
+            for attachment in attachments:
+                sources[attachment.res_id] = (
+                    attachment._full_path(attachment.store_fname) if attachment.store_fname else attachment.raw
+                )
+            for version_id, digest in sha1_sources(sources, max_workers).items():
+                version = batch.browse(version_id)
+                if digest != version.checksum:
+                    mismatches.append(
+                        {
+                            "model": self._name,
+                            "id": version_id,
+                            "name": version.name,
+                            "checksum": version.checksum,
+                            "computed": digest,
+                        }
+                    )
+            batch.invalidate_recordset()
+        return mismatches
@@ -1,4 +1,5 @@
 from . import (
+    test_benchmark,
     test_classification,
     test_dms_access,
     test_dms_file_workflow,
@@ -0,0 +1,292 @@
+import base64
+import io
+import json
+import logging
+import os
+import random
+import statistics
+import time
+
+from docx import Document
+from openpyxl import Workbook
+from reportlab.pdfgen import canvas
+
+from odoo.tests import tagged
+
+from .common import IsicGedCase
+
+_logger = logging.getLogger(__name__)
+
+# Sizes can be raised from the environment, e.g.
+# ISIC_GED_BENCHMARK_PARAGRAPHS=200 ISIC_GED_BENCHMARK_CORPUS=1000,10000,50000
+BENCHMARK_DEFAULTS = {
+    "paragraphs": 20,
+    "samples": 10,
+    "queries": 20,
+    "corpus": "100,500",
+}
+CREATE_BATCH_SIZE = 500
+
+WORDS = [
+    "rapport",
+    "conseil",
+    "etablissement",
+    "etudiant",
+    "enseignant",
+    "examen",
+    "deliberation",
+    "semestre",
+    "module",
+    "filiere",
+    "inscription",
+    "diplome",
+    "attestation",
+    "releve",
+    "note",
+    "budget",
+    "marche",
+    "convention",
+    "partenariat",
+    "stage",
+    "soutenance",
+    "memoire",
+    "recherche",
+    "laboratoire",
+    "bibliotheque",
+    "archive",
+    "circulaire",
+    "decision",
+    "arrete",
+    "reunion",
+    "proces",
+    "verbal",
+    "calendrier",
+    "emploi",
+    "temps",
+    "salle",
+    "departement",
+    "direction",
+    "scolarite",
+    "comptabilite",
+    "achat",
+    "facture",
+]
+
+
+def _benchmark_setting(key):
+    value = os.environ.get(f"ISIC_GED_BENCHMARK_{key.upper()}", BENCHMARK_DEFAULTS[key])
+    if key == "corpus":
+        return [int(size) for size in str(value).split(",")]
+    return int(value)
+
+
+def _percentiles(samples):
+    """Return the median and the 95th percentile of the samples, in milliseconds."""
+    if len(samples) < 2:
+        p50 = p95 = samples[0] if samples else 0.0
+    else:
+        cuts = statistics.quantiles(samples, n=20, method="inclusive")
+        p50, p95 = cuts[9], cuts[18]
+    return {"p50_ms": round(p50 * 1000, 3), "p95_ms": round(p95 * 1000, 3), "samples": len(samples)}
+
+
+# ----------------------------------------------------------
+# Fixtures
+# ----------------------------------------------------------
+
+
+def _make_paragraphs(rng, count, token=""):
+    paragraphs = [" ".join(rng.choices(WORDS, k=40)) for __ in range(count)]
+    if token and paragraphs:
+        paragraphs[0] = f"{token} {paragraphs[0]}"
+    return paragraphs
+
+
+def _make_text(paragraphs):
+    return "\n\n".join(paragraphs).encode()
+
+
+def _make_pdf(paragraphs):
+    output = io.BytesIO()
+    pdf = canvas.Canvas(output)
+    for index, paragraph in enumerate(paragraphs):
+        if index and not index % 5:
+            pdf.showPage()
+        words = paragraph.split()
+        y = 800 - (index % 5) * 150
+        for offset in range(0, len(words), 10):
+            pdf.drawString(40, y, " ".join(words[offset : offset + 10]))
+            y -= 14
+    pdf.save()
+    return output.getvalue()
+
+
+def _make_docx(paragraphs):
+    output = io.BytesIO()
+    document = Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(output)
+    return output.getvalue()
+
+
+def _make_xlsx(paragraphs):
+    output = io.BytesIO()
+    workbook = Workbook()
+    sheet = workbook.active
+    for paragraph in paragraphs:
+        sheet.append(paragraph.split()[:20])
+    workbook.save(output)
+    return output.getvalue()
+
+
+FIXTURES = {
+    "txt": ("text/plain", _make_text),
+    "pdf": ("application/pdf", _make_pdf),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", _make_docx),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", _make_xlsx),
+}
+
+
+# These tests are only executed if --test-tags benchmark is defined
+@tagged("-standard", "benchmark")
+class TestGedBenchmark(IsicGedCase):
+    """Measure the ingestion, full-text search and versioning throughput.
+
+    The measures are logged and, when ``ISIC_GED_BENCHMARK_REPORT`` gives a
+    path, written there as JSON to compare runs across commits.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True, mail_create_nolog=True))
+        cls.settings = {key: _benchmark_setting(key) for key in BENCHMARK_DEFAULTS}
+        cls.report = {"settings": dict(cls.settings), "results": {}}
+        cls.rng = random.Random(42)
+
+    @classmethod
+    def tearDownClass(cls):
+        path = os.environ.get("ISIC_GED_BENCHMARK_REPORT")
+        if path:
+            with open(path, "w") as report:
+                json.dump(cls.report, report, indent=2, sort_keys=True)
+            _logger.info("GED benchmark report written to %s", path)
+        super().tearDownClass()
+
+    def _record(self, name, measure):
+        self.report["results"][name] = measure
+        _logger.info("%s: %s", name, json.dumps(measure))
+
+    def _fixture(self, extension, token=""):
+        __, make = FIXTURES[extension]
+        return make(_make_paragraphs(self.rng, self.settings["paragraphs"], token=token))
+
+    def test_extraction_throughput(self):
+        """Extraction time per mimetype, without the ORM overhead."""
+        DmsFile = self.env["dms.file"]
+        extractors = {
+            "txt": lambda binary: binary.decode("utf-8", errors="replace"),
+            "pdf": DmsFile._extract_pdf,
+            "docx": DmsFile._extract_docx,
+            "xlsx": DmsFile._extract_xlsx,
+        }
+        for extension, extract in extractors.items():
+            binaries = [self._fixture(extension) for __ in range(self.settings["samples"])]
+            durations = []
+            for binary in binaries:
+                start = time.perf_counter()
+                text = extract(binary)
+                durations.append(time.perf_counter() - start)
+                self.assertTrue(text)
+            total = sum(durations)
+            size = sum(len(binary) for binary in binaries)
+            self._record(
+                f"extraction.{extension}",
+                {
+                    **_percentiles(durations),
+                    "documents_per_s": round(len(binaries) / total, 2),
+                    "mb_per_s": round(size / total / 1024 / 1024, 3),
+                    "average_size": size // len(binaries),
+                },
+            )
+
+    def test_upload_to_searchable_latency(self):
+        """Time between the upload of a document and its first full-text hit."""
+        DmsFile = self.env["dms.file"]
+        for extension, (mimetype, __) in FIXTURES.items():
+            durations = []
+            queries = []
+            for index in range(self.settings["samples"]):
+                token = f"jeton{extension}{index}"
+                content = base64.b64encode(self._fixture(extension, token=token))
+                query_count = self.env.cr.sql_log_count
+                start = time.perf_counter()
+                record = self._create_file(name=f"{token}.{extension}", content=content)
+                found = DmsFile.search_fulltext(token)
+                durations.append(time.perf_counter() - start)
+                queries.append(self.env.cr.sql_log_count - query_count)
+                self.assertEqual(record.mimetype, mimetype)
+                self.assertIn(record, found)
+            self._record(
+                f"upload_to_searchable.{extension}",
+                {**_percentiles(durations), "queries": max(queries)},
+            )
+
+    def test_search_fulltext_scaling(self):
+        """Full-text search latency while the corpus grows."""
+        DmsFile = self.env["dms.file"]
+        count = 0
+        for size in sorted(self.settings["corpus"]):
+            while count < size:
+                batch = range(count, min(count + CREATE_BATCH_SIZE, size))
+                DmsFile.create(
+                    [
+                        {
+                            "name": f"corpus-{index}.txt",
+                            "directory_id": self.directory.id,
+                            "content": base64.b64encode(self._fixture("txt")),
+                        }
+                        for index in batch
+                    ]
+                )
+                count += len(batch)
+                self.env.flush_all()
+                self.env.invalidate_all()
+            durations = []
+            for __ in range(self.settings["queries"]):
+                query = " ".join(self.rng.sample(WORDS, 2))
+                start = time.perf_counter()
+                DmsFile.search_fulltext(query)
+                durations.append(time.perf_counter() - start)
+            self._record(f"search_fulltext.{size}", _percentiles(durations))
+
+    def test_version_snapshot_cost(self):
+        """Cost of a content update with and without the version snapshot."""
+        for name, context in (("with_snapshot", {}), ("without_snapshot", {"_isic_skip_version": True})):
+            records = self.env["dms.file"].create(
+                [
+                    {
+                        "name": f"{name}-{index}.docx",
+                        "directory_id": self.directory.id,
+                        "content": base64.b64encode(self._fixture("docx")),
+                    }
+                    for index in range(self.settings["samples"])
+                ]
+            )
+            durations = []
+            queries = []
+            for record in records:
+                content = base64.b64encode(self._fixture("docx"))
+                self.env.invalidate_all()
+                query_count = self.env.cr.sql_log_count
+                start = time.perf_counter()
+                record.with_context(**context).write({"content": content})
+                self.env.flush_all()
+                durations.append(time.perf_counter() - start)
+                queries.append(self.env.cr.sql_log_count - query_count)
+            self.assertEqual(records.mapped("version_count"), [0 if context else 1] * len(records))
+            self._record(
+                f"versioning.{name}",
+                {**_percentiles(durations), "queries": max(queries)},
+            )
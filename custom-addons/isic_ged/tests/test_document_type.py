@@ -81,3 +81,13 @@ class TestDocumentType(TransactionCase):
         dt = self.DocType.with_user(user).create({"name": "Dir Type", "code": "DDIR"})
         dt.write({"name": "Dir Type Updated"})
         dt.unlink()
+
+    def test_cold_policy_by_document_type(self):
+        """Les types avec un délai propre ont leur politique d'archivage froid."""
+        storage = self.env["dms.storage"].create({"name": "Cold", "cold_after_days": 730})
+        dt = self.DocType.create({"name": "Archive", "code": "COLD", "cold_after_days": 30})
+        policies = storage._get_cold_policies()
+        self.assertIn(([("document_type_id", "=", dt.id)], 30), policies)
+        default_domain, default_days = policies[0]
+        self.assertEqual(default_days, 730)
+        self.assertIn(("document_type_id", "not in", [dt.id]), default_domain)
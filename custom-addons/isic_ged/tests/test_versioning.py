@@ -1,4 +1,5 @@
 import base64
+import hashlib
 
 from .common import IsicGedCase
 
@@ -87,3 +88,15 @@ class TestVersioning(IsicGedCase):
 
         version = f.version_ids[0]
         self.assertIn("v1", version.display_name)
+
+    def test_verify_version_contents(self):
+        """Le contrôle d'intégrité signale les versions dont le contenu ne correspond plus."""
+        f = self._create_file(content=base64.b64encode(b"v1"))
+        f.write({"content": base64.b64encode(b"v2")})
+        version = f.version_ids[0]
+        Version = self.env["isic.document.version"]
+        self.assertNotIn(version.id, [item["id"] for item in Version._verify_contents()])
+        version.sudo().write({"checksum": "0" * 40})
+        mismatches = {item["id"]: item for item in Version._verify_contents(batch_size=1)}
+        self.assertIn(version.id, mismatches)
+        self.assertEqual(mismatches[version.id]["computed"], hashlib.sha1(b"v1").hexdigest())
@@ -5,8 +5,8 @@ from odoo.http import request
 class IsicDmsPortal(DmsPortal):
     """Override DMS portal to hide draft documents for portal users."""
 
-    def _get_files(self, access_token, dms_directory_id, search, search_in, sort_br):
-        files = super()._get_files(access_token, dms_directory_id, search, search_in, sort_br)
+    def _get_files_domain(self, dms_directory_id, search, search_in):
+        domain = super()._get_files_domain(dms_directory_id, search, search_in)
         if request.env.user.has_group("base.group_portal"):
-            files = files.filtered(lambda f: f.ged_state != "draft")
-        return files
+            domain.append(("ged_state", "!=", "draft"))
+        return domain
@@ -0,0 +1,109 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import functools
+
+from odoo import api, http
+from odoo.http import Response, content_disposition, request
+
+from ..tools.archive import zip_stream
+from ..tools.file import unique_name
+
+
+class DmsExportController(http.Controller):
+    @http.route("/dms/export/zip", type="http", auth="user")
+    def export_zip(self, directory_ids="", file_ids="", **kwargs):
+        """
+        Download directories (with their whole subtree) and files as a ZIP.
+
+        The archive is generated while it is sent: nothing is buffered in
+        memory or written to a temporary file.
+
+        :param str directory_ids: Comma separated ids of dms.directory
+        :param str file_ids: Comma separated ids of dms.file
+
+        :return: response
+        :rtype: odoo.http.Response
+        """
+        directories = request.env["dms.directory"].browse(
+            self._parse_ids(directory_ids)
+        )
+        files = request.env["dms.file"].browse(self._parse_ids(file_ids))
+        files.check_access("read")
+        paths = directories._get_export_paths()
+        entries = []
+        accessed_files = files
+        if paths:
+            contained_files = request.env["dms.file"].search(
+                [("directory_id", "in", list(paths))]
+            )
+            accessed_files |= contained_files
+            for dms_file in contained_files:
+                arcname = paths[dms_file.directory_id.id] + dms_file.name
+                entries.append((arcname, dms_file))
+        used_names = {path.split("/", 1)[0] for path in paths.values()}
+        for dms_file in files:
+            arcname = unique_name(dms_file.name, used_names, escape_suffix=True)
+            used_names.add(arcname)
+            entries.append((arcname, dms_file))
+        accessed_files._touch_last_access()
+        if len(directories) == 1 and not files:
+            filename = f"{directories.name}.zip"
+        else:
+            filename = "documents.zip"
+        # The response is iterated once the request has been released, the
+        # registry can't be read from it in the generator
+        stream = self._stream_zip(
+            request.env.registry,
+            request.env.uid,
+            [
+                (arcname, dms_file.write_date.timetuple()[:6], dms_file.id)
+                for arcname, dms_file in entries
+            ],
+            sorted(paths.values()),
+        )
+        return Response(
+            stream,
+            headers=[
+                ("Content-Type", "application/zip"),
+                ("Content-Disposition", content_disposition(filename)),
+            ],
+            direct_passthrough=True,
+        )
+
+    def _parse_ids(self, ids):
+        return [int(item) for item in (ids or "").split(",") if item.strip()]
+
+    def _stream_zip(self, registry, uid, entries, directories):
+        """
+        Stream the archive content.
+
+        The request cursor is closed as soon as the controller returns, so the
+        blobs are read through a dedicated cursor once access has already been
+        checked for every entry.
+
+        :param registry: The registry of the database, the generator runs
+            outside of the request
+        :param int uid: The user the entries were checked for
+        """
+        with registry.cursor() as cr:
+            env = api.Environment(cr, uid, {})
+            file_model = env["dms.file"]
+            attachments = file_model.browse(
+                [file_id for __, __, file_id in entries]
+            )._get_content_attachments()
+            empty_attachment = env["ir.attachment"]
+            yield from zip_stream(
+                (
+                    (
+                        arcname,
+                        date_time,
+                        functools.partial(
+                            file_model.browse(file_id)._open_content,
+                            attachments.get(file_id, empty_attachment),
+                        ),
+                    )
+                    for arcname, date_time, file_id in entries
+                ),
+                directories=directories,
+            )
@@ -1,17 +1,21 @@
 # Copyright 2020-2021 Tecnativa - Víctor Martínez
 # Copyright 2024 Subteno - Timothée VANNIER (https://www.subteno.com).
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl).
-import base64
+import re
 from typing import Optional  # noqa # pylint: disable=unused-import
+from urllib.parse import urlencode
 
 from odoo import _, http
-from odoo.http import content_disposition, request
-from odoo.osv.expression import OR
+from odoo.http import request
+from odoo.osv.expression import AND, OR
 
 from odoo.addons.portal.controllers.portal import CustomerPortal
 from odoo.addons.web.controllers.utils import ensure_db
 
 
+CURSOR_RE = re.compile(r"^([df])(\d+)$")
+
+
 class CustomerPortal(CustomerPortal):
     def _dms_check_access(self, model, res_id, access_token=None):
         """
@@ -42,7 +46,14 @@ class CustomerPortal(CustomerPortal):
 
     @http.route(["/my/dms"], type="http", auth="user", website=True)
     def portal_my_dms(
-        self, sortby=None, filterby=None, search=None, search_in="name", **kw
+        self,
+        sortby=None,
+        filterby=None,
+        search=None,
+        search_in="name",
+        after=None,
+        before=None,
+        **kw,
     ):
         """
         Display the main page for the DMS module.
@@ -51,6 +62,8 @@ class CustomerPortal(CustomerPortal):
         :param Optional[str] filterby: The field to filter by
         :param Optional[str] search: The search term
         :param Optional[str] search_in: The field to search in
+        :param Optional[str] after: Cursor of the item preceding the page
+        :param Optional[str] before: Cursor of the item following the page
 
         :return: response
         :rtype: odoo.http.Response
@@ -71,12 +84,21 @@ class CustomerPortal(CustomerPortal):
         if search and search_in == "name":
             domain += OR([[], [("name", "ilike", search)]])
         # content according to pager and archive selected
-        items = request.env["dms.directory"].search(domain, order=sort_order)
-        request.session["my_dms_folder_history"] = items.ids
+        backward, cursor = self._dms_parse_cursor(before or after, bool(before))
+        if cursor and cursor["kind"] != "directory":
+            backward, cursor = False, None
+        items = request.env["dms.directory"].search(
+            self._dms_keyset_domain(domain, cursor, backward),
+            order=self._dms_keyset_order(sort_order, backward),
+            limit=self._items_per_page + 1,
+        )
+        page = self._dms_page(items, request.env["dms.file"], cursor, backward)
+        request.session["my_dms_folder_history"] = page["directories"].ids
         # values
         values.update(
             {
-                "dms_directories": items,
+                "dms_directories": page["directories"],
+                "dms_pager": self._dms_pager("/my/dms", page),
                 "page_name": "dms_directory",
                 "default_url": "/my/dms",
                 "searchbar_sortings": searchbar_sortings,
@@ -103,17 +125,25 @@ class CustomerPortal(CustomerPortal):
         search=None,
         search_in="name",
         access_token=None,
+        after=None,
+        before=None,
         **kw,
     ):
         """
         Display the content of a directory.
 
+        Subdirectories come first, then files, both ordered by name. The
+        content is paginated with keyset cursors, so no page requires to
+        load or count the whole directory.
+
         :param Optional[int] dms_directory_id: dms_directory_id
         :param Optional[str] sortby: sortby
         :param Optional[str] filterby: filterby
         :param Optional[str] search: search
         :param Optional[str] search_in: search_in
         :param Optional[str] access_token: access_token
+        :param Optional[str] after: Cursor of the item preceding the page
+        :param Optional[str] before: Cursor of the item following the page
 
         :return: response
         :rtype: odoo.http.Response
@@ -127,24 +157,58 @@ class CustomerPortal(CustomerPortal):
             sort_order,
             sortby,
         ) = self._searchbar_data(filterby, sortby)
-        dms_directory_items, res = self._get_directories(
-            access_token, dms_directory_id, search, search_in, sort_order
-        )
+        res = self._dms_check_access("dms.directory", dms_directory_id, access_token)
         if not res:
             return request.redirect("/" if access_token else "/my")
 
         dms_directory_sudo = res
-        # dms_files_count
-        dms_file_items = self._get_files(
-            access_token, dms_directory_id, search, search_in, sort_order
-        )
+        backward, cursor = self._dms_parse_cursor(before or after, bool(before))
+        # Subdirectories are listed before the files, a page may hold the
+        # last subdirectories followed by the first files.
+        kinds = ["file", "directory"] if backward else ["directory", "file"]
+        if cursor:
+            kinds = kinds[kinds.index(cursor["kind"]) :]
+        items = {
+            "directory": request.env["dms.directory"],
+            "file": request.env["dms.file"],
+        }
+        limit = self._items_per_page + 1
+        for kind in kinds:
+            kind_cursor = cursor if cursor and cursor["kind"] == kind else None
+            if kind == "directory":
+                items[kind] = self._get_directories(
+                    dms_directory_sudo,
+                    search,
+                    search_in,
+                    sort_order,
+                    cursor=kind_cursor,
+                    backward=backward,
+                    limit=limit,
+                )
+            else:
+                items[kind] = self._get_files(
+                    dms_directory_sudo,
+                    search,
+                    search_in,
+                    sort_order,
+                    cursor=kind_cursor,
+                    backward=backward,
+                    limit=limit,
+                )
+            limit -= len(items[kind])
+            if not limit:
+                break
+        page = self._dms_page(items["directory"], items["file"], cursor, backward)
+        request.session["my_dms_folder_history"] = page["directories"].ids
+        request.session["my_dms_file_history"] = page["files"].ids
 
         dms_parent_categories = dms_directory_sudo.sudo()._get_parent_categories(
             access_token
         )
         # values
         values = {
-            "dms_directories": dms_directory_items,
+            "dms_directories": page["directories"],
+            "dms_pager": self._dms_pager(f"/my/dms/directory/{dms_directory_id}", page),
             "page_name": "dms_directory",
             "default_url": "/my/dms",
             "searchbar_sortings": searchbar_sortings,
@@ -154,26 +218,57 @@ class CustomerPortal(CustomerPortal):
             "filterby": filterby,
             "access_token": access_token,
             "dms_directory": dms_directory_sudo,
-            "dms_files": dms_file_items,
+            "dms_files": page["files"],
             "dms_parent_categories": dms_parent_categories,
         }
         return request.render("dms.portal_my_dms", values)
 
-    def _get_files(self, access_token, dms_directory_id, search, search_in, sort_br):
+    def _get_files(
+        self,
+        dms_directory,
+        search,
+        search_in,
+        sort_br,
+        cursor=None,
+        backward=False,
+        limit=None,
+    ):
         """
-        Get files from dms_directory_id
+        Get files from dms_directory
 
-        :param Optional[str] access_token: access_token
-        :param int dms_directory_id: dms_directory_id
+        :param odoo.model.dms_directory dms_directory: The directory, already
+            checked by _dms_check_access, as superuser for a valid access_token
         :param Optional[str] search: search
         :param Optional[str] search_in: search_in
         :param str sort_br: sort_br
+        :param Optional[dict] cursor: Cursor of a file to start after
+        :param bool backward: Whether to get the files before the cursor
+        :param Optional[int] limit: limit
 
         :return: dms_file_items
         :rtype: odoo.model.dms_file
         """
-        if not dms_directory_id:
-            return request.env["dms.file"]
+        file_model = dms_directory.env["dms.file"]
+        if not dms_directory:
+            return file_model
+        file_domain = self._get_files_domain(dms_directory.id, search, search_in)
+        return file_model.search(
+            self._dms_keyset_domain(file_domain, cursor, backward),
+            order=self._dms_keyset_order(sort_br, backward),
+            limit=limit,
+        )
+
+    def _get_files_domain(self, dms_directory_id, search, search_in):
+        """
+        Get the domain of the files listed in dms_directory_id
+
+        :param int dms_directory_id: dms_directory_id
+        :param Optional[str] search: search
+        :param Optional[str] search_in: search_in
+
+        :return: file_domain
+        :rtype: list
+        """
         file_domain = [
             ("is_hidden", "=", False),
             ("directory_id", "=", dms_directory_id),
@@ -181,48 +276,153 @@ class CustomerPortal(CustomerPortal):
         # search
         if search and search_in == "name":
             file_domain.append(("name", "ilike", search))
-
-        # items
-        file_model = request.env["dms.file"]
-        is_access_token_valid = file_model.check_access_token(access_token)
-        file_model = file_model.sudo() if is_access_token_valid else file_model
-        dms_file_items = file_model.search(file_domain, order=sort_br)
-        request.session["my_dms_file_history"] = dms_file_items.ids
-        return dms_file_items
+        return file_domain
 
     def _get_directories(
-        self, access_token, dms_directory_id, search, search_in, sort_order
+        self,
+        dms_directory,
+        search,
+        search_in,
+        sort_order,
+        cursor=None,
+        backward=False,
+        limit=None,
     ):
         """
-        Get directories from dms_directory_id
+        Get directories from dms_directory
 
-        :param Optional[str] access_token: access_token
-        :param int dms_directory_id: dms_directory_id
+        :param odoo.model.dms_directory dms_directory: The directory, already
+            checked by _dms_check_access, as superuser for a valid access_token
         :param Optional[str] search: search
         :param Optional[str] search_in: search_in
         :param str sort_order: sort_br
+        :param Optional[dict] cursor: Cursor of a directory to start after
+        :param bool backward: Whether to get the directories before the cursor
+        :param Optional[int] limit: limit
 
-        :return: dms_directory_items, res
-        :rtype: tuple[odoo.model.dms_directory, bool|odoo.model.dms_directory]
+        :return: dms_directory_items
+        :rtype: odoo.model.dms_directory
         """
         # domain
-        domain = [("is_hidden", "=", False), ("parent_id", "=", dms_directory_id)]
+        domain = [("is_hidden", "=", False), ("parent_id", "=", dms_directory.id)]
         # search
         if search and search_in:
             domain.append(("name", "ilike", search))
 
         # content according to pager and archive selected
-        directory_model = request.env["dms.directory"]
-        directory_to_check = directory_model.browse(dms_directory_id)
-        is_access_token_valid = directory_to_check.check_access_token(access_token)
-        directory_model = (
-            directory_model.sudo() if is_access_token_valid else directory_model
+        return dms_directory.env["dms.directory"].search(
+            self._dms_keyset_domain(domain, cursor, backward),
+            order=self._dms_keyset_order(sort_order, backward),
+            limit=limit,
         )
-        dms_directory_items = directory_model.search(domain, order=sort_order)
 
-        request.session["my_dms_folder_history"] = dms_directory_items.ids
-        res = self._dms_check_access("dms.directory", dms_directory_id, access_token)
-        return dms_directory_items, res
+    def _dms_parse_cursor(self, value, backward):
+        """
+        Parse a pager cursor, ``d<id>`` for a directory or ``f<id>`` for a file.
+
+        :param Optional[str] value: value
+        :param bool backward: Whether the page ends before the cursor
+
+        :return: backward, cursor
+        :rtype: tuple[bool, Optional[dict]]
+        """
+        match = CURSOR_RE.match(value or "")
+        if not match:
+            return False, None
+        kind = "directory" if match.group(1) == "d" else "file"
+        # Only the position of the item is needed, not its content
+        item = request.env[f"dms.{kind}"].sudo().browse(int(match.group(2))).exists()
+        if not item:
+            return False, None
+        return backward, {"kind": kind, "id": item.id, "name": item.name}
+
+    def _dms_keyset_domain(self, domain, cursor, backward):
+        """
+        Restrict a domain to the items following (or preceding) a cursor.
+
+        :param list domain: domain
+        :param Optional[dict] cursor: cursor
+        :param bool backward: backward
+
+        :return: domain
+        :rtype: list
+        """
+        if not cursor:
+            return domain
+        operator = "<" if backward else ">"
+        return AND(
+            [
+                domain,
+                [
+                    "|",
+                    ("name", operator, cursor["name"]),
+                    "&",
+                    ("name", "=", cursor["name"]),
+                    ("id", operator, cursor["id"]),
+                ],
+            ]
+        )
+
+    def _dms_keyset_order(self, sort_order, backward):
+        if not backward:
+            return sort_order
+        return sort_order.replace(" asc", " desc")
+
+    def _dms_page(self, directories, files, cursor, backward):
+        """
+        Cut a page out of the items fetched around a cursor.
+
+        :param odoo.model.dms_directory directories: Directories, in search order
+        :param odoo.model.dms_file files: Files, in search order
+        :param Optional[dict] cursor: cursor
+        :param bool backward: backward
+
+        :return: The directories and files of the page and the cursors of the
+            previous and next pages
+        :rtype: dict
+        """
+        items = [*files, *directories] if backward else [*directories, *files]
+        more = len(items) > self._items_per_page
+        items = items[: self._items_per_page]
+        if backward:
+            items.reverse()
+        has_previous = more if backward else bool(cursor)
+        has_next = bool(cursor) if backward else more
+        return {
+            "directories": directories.browse(
+                [item.id for item in items if item._name == "dms.directory"]
+            ),
+            "files": files.browse(
+                [item.id for item in items if item._name == "dms.file"]
+            ),
+            "before": has_previous and items and self._dms_format_cursor(items[0]),
+            "after": has_next and items and self._dms_format_cursor(items[-1]),
+        }
+
+    def _dms_format_cursor(self, item):
+        return f"{'d' if item._name == 'dms.directory' else 'f'}{item.id}"
+
+    def _dms_pager(self, url, page):
+        """
+        Get the urls of the previous and next pages.
+
+        :param str url: url
+        :param dict page: page
+
+        :return: pager
+        :rtype: dict
+        """
+        params = {
+            key: value
+            for key, value in request.httprequest.args.items()
+            if key not in ("after", "before")
+        }
+        return {
+            "previous_url": page["before"]
+            and f"{url}?{urlencode(dict(params, before=page['before']))}",
+            "next_url": page["after"]
+            and f"{url}?{urlencode(dict(params, after=page['after']))}",
+        }
 
     def _searchbar_data(self, filterby, sortby):
         """
@@ -235,7 +435,8 @@ class CustomerPortal(CustomerPortal):
         sortby
         :rtype: tuple[str, dict, dict, str, str]
         """
-        searchbar_sortings = {"name": {"label": _("Name"), "order": "name asc"}}
+        # Pages are cut with keyset cursors on (name, id)
+        searchbar_sortings = {"name": {"label": _("Name"), "order": "name asc, id asc"}}
         # default sortby
         if not sortby:
             sortby = "name"
@@ -279,10 +480,5 @@ class CustomerPortal(CustomerPortal):
 
         if res.attachment_id and request.env.user.has_group("base.group_portal"):
             res = res.sudo()
-        file_content = base64.b64decode(res.content)
-        content_type = ("Content-Type", "application/octet-stream")
-        disposition_content = (
-            "Content-Disposition",
-            content_disposition(res.name),
-        )
-        return request.make_response(file_content, [content_type, disposition_content])
+        res._touch_last_access()
+        return res._get_content_stream().get_response(as_attachment=True)
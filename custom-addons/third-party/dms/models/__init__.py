@@ -9,6 +9,8 @@ from . import abstract_dms_mixin
 
 from . import storage
 from . import directory
+from . import dms_blob
+from . import dms_cold_content
 from . import dms_file
 
 from . import onboarding_onboarding
@@ -17,6 +19,8 @@ from . import dms_category
 from . import tag
 
 from . import res_company
+from . import res_groups
+from . import res_users
 from . import res_config_settings
 from . import ir_attachment
 from . import ir_binary
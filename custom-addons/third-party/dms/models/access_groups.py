@@ -141,10 +141,11 @@ class DmsAccessGroups(models.Model):
         "parent_group_id",
         "parent_group_id.users",
         "group_ids",
-        "group_ids.user_ids",
         "explicit_user_ids",
     )
     def _compute_users(self):
+        """Changes of the members of ``group_ids`` are applied by
+        :meth:`_update_users_membership`."""
         for record in self:
             users = (
                 record.group_ids.user_ids
@@ -153,6 +154,90 @@ class DmsAccessGroups(models.Model):
             )
             record.update({"users": users, "count_users": len(users)})
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records.sudo().directory_ids._refresh_complete_groups()
+        return records
+
+    def write(self, vals):
+        if "directory_ids" not in vals:
+            return super().write(vals)
+        directories = self.sudo().directory_ids
+        res = super().write(vals)
+        (directories | self.sudo().directory_ids)._refresh_complete_groups()
+        return res
+
+    @api.model
+    def _update_users_membership(self, user_ids):
+        """Update the membership of some users in every access group.
+
+        Only the ``(group, user)`` pairs of these users are recomputed, through
+        the explicit users, the users of ``group_ids`` and the parent groups,
+        and the difference is applied to ``dms_access_group_users_rel``.
+
+        :param list user_ids: The users whose ``res.groups`` changed.
+        """
+        if not user_ids:
+            return
+        self.env["res.users"].flush_model(["group_ids"])
+        self.env["res.groups"].flush_model(["user_ids"])
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            WITH RECURSIVE membership(gid, uid) AS (
+                SELECT gid, uid
+                FROM dms_access_group_explicit_users_rel
+                WHERE uid = ANY(%(user_ids)s)
+                UNION
+                SELECT g.gid, u.uid
+                FROM dms_access_group_groups_rel g
+                JOIN res_groups_users_rel u ON u.gid = g.rid
+                WHERE u.uid = ANY(%(user_ids)s)
+                UNION
+                SELECT child.id, membership.uid
+                FROM membership
+                JOIN dms_access_group child
+                    ON child.parent_group_id = membership.gid
+            ), deleted AS (
+                DELETE FROM dms_access_group_users_rel r
+                WHERE r.uid = ANY(%(user_ids)s)
+                    AND NOT EXISTS (
+                        SELECT 1
+                        FROM membership m
+                        WHERE m.gid = r.gid AND m.uid = r.uid
+                    )
+                RETURNING r.gid
+            ), inserted AS (
+                INSERT INTO dms_access_group_users_rel (gid, uid)
+                SELECT gid, uid
+                FROM membership
+                ON CONFLICT DO NOTHING
+                RETURNING gid
+            )
+            SELECT gid FROM deleted
+            UNION
+            SELECT gid FROM inserted
+            """,
+            {"user_ids": list(user_ids)},
+        )
+        group_ids = [row[0] for row in self.env.cr.fetchall()]
+        if not group_ids:
+            return
+        self.env.cr.execute(
+            """
+            UPDATE dms_access_group g
+            SET count_users = (
+                SELECT COUNT(*)
+                FROM dms_access_group_users_rel r
+                WHERE r.gid = g.id
+            )
+            WHERE g.id = ANY(%(group_ids)s)
+            """,
+            {"group_ids": group_ids},
+        )
+        self.browse(group_ids).invalidate_recordset(["users", "count_users"])
+
     def copy_data(self, default=None):
         vals_list = super().copy_data(default)
         for group, vals in zip(self, vals_list, strict=False):
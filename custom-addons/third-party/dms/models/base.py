@@ -3,6 +3,8 @@
 # Copyright 2024 Subteno - Timothée Vannier (https://www.subteno.com).
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl).
 
+from collections import defaultdict
+
 from odoo import models
 
 
@@ -12,22 +14,48 @@ class Base(models.AbstractModel):
     def unlink(self):
         """Cascade DMS related resources removal.
         Avoid executing in ir.* models (ir.mode, ir.model.fields, etc), in transient
-        models and in the models we want to check."""
+        models, in the models we want to check and in the models no DMS record was
+        ever linked to."""
         result = super().unlink()
         if (
             self.ids
             and not self._name.startswith("ir.")
             and not self.is_transient()
             and self._name not in ("dms.file", "dms.directory")
+            and self._name in self.env["dms.directory"]._get_linked_res_models()
         ):
-            domain = [("res_model", "=", self._name), ("res_id", "in", self.ids)]
-            # Has to check if existing before unlinking, because even if the search
-            # returns an empty recordset, it will still call the unlink method on it.
-            # This can result in an infinite loop and a recursion depth error.
-            files = self.env["dms.file"].sudo().search(domain)
-            if files:
-                files.unlink()
-            directories = self.env["dms.directory"].sudo().search(domain)
-            if directories:
-                directories.unlink()
+            self._dms_unlink_linked_records()
         return result
+
+    def _dms_unlink_linked_records(self):
+        """Remove the DMS files and directories linked to the records.
+
+        Archived files and directories are removed as well, they would be left
+        without their record otherwise.
+        """
+        dms_models = ("dms.file", "dms.directory")
+        for model_name in dms_models:
+            self.env[model_name].flush_model(["res_model", "res_id"])
+        self.env.cr.execute(
+            """
+            SELECT 'dms.file', id
+            FROM dms_file
+            WHERE res_model = %(res_model)s AND res_id = ANY(%(res_ids)s)
+            UNION ALL
+            SELECT 'dms.directory', id
+            FROM dms_directory
+            WHERE res_model = %(res_model)s AND res_id = ANY(%(res_ids)s)
+            """,
+            {"res_model": self._name, "res_ids": self.ids},
+        )
+        linked_ids = defaultdict(list)
+        for model_name, record_id in self.env.cr.fetchall():
+            linked_ids[model_name].append(record_id)
+        # Has to check if existing before unlinking, because even if the search
+        # returns an empty recordset, it will still call the unlink method on it.
+        # This can result in an infinite loop and a recursion depth error.
+        for model_name in dms_models:
+            records = self.env[model_name].sudo().browse(linked_ids[model_name])
+            records = records.exists()
+            if records:
+                records.unlink()
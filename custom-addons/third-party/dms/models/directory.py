@@ -15,7 +15,7 @@ from typing import Literal  # noqa # pylint: disable=unused-import
 from odoo import _, api, fields, models, tools
 from odoo.exceptions import UserError, ValidationError
 from odoo.osv.expression import AND, NEGATIVE_TERM_OPERATORS, OR
-from odoo.tools import consteq, human_size
+from odoo.tools import SQL, consteq, human_size, ormcache, sql
 
 from ..tools.file import check_name, unique_name
 
@@ -45,6 +45,13 @@ class DmsDirectory(models.Model):
     _directory_field = _parent_name
 
     parent_path = fields.Char(index="btree")
+    deletion_pending = fields.Boolean(
+        readonly=True,
+        copy=False,
+        index=True,
+        help="The directory and its content are being deleted in background.",
+    )
+    access_token = fields.Char(index="btree_not_null")
     is_root_directory = fields.Boolean(
         default=False,
         help="""Indicates if the directory is a root directory.
@@ -106,7 +113,6 @@ class DmsDirectory(models.Model):
         readonly=True,
         store=True,
         compute_sudo=True,
-        recursive=True,
     )
     complete_name = fields.Char(
         compute="_compute_complete_name", store=True, recursive=True
@@ -236,28 +242,52 @@ class DmsDirectory(models.Model):
         return res
 
     def check_access_token(self, access_token=False):
-        res = False
-        if access_token:
-            items = (
-                self.env["dms.directory"]
-                .sudo()
-                .search([("access_token", "=", access_token)])
-            )
-            if items:
-                item = items[0]
-                if item.id == self.id:
-                    return True
-                # sudo because the user might not usually have access to the record but
-                # now the token is valid.
-                directory_item = self.sudo()
-                while directory_item.parent_id:
-                    if directory_item.id == item.id:
-                        return True
-                    directory_item = directory_item.parent_id
-                # Fix last level
-                if directory_item.id == item.id:
-                    return True
-        return res
+        if not access_token:
+            return False
+        return self._check_access_token_subtree(access_token, self.id)
+
+    @api.model
+    @ormcache()
+    def _get_linked_res_models(self):
+        """Get the models having records linked to DMS directories.
+
+        Files are linked through their directory, so the directories tell all
+        the models concerned by the removal cascade. The result is cached
+        across requests and cleared when a directory is linked to a new model.
+
+        :return: The model names.
+        :rtype: frozenset
+        """
+        self.flush_model(["res_model"])
+        self.env.cr.execute(
+            "SELECT DISTINCT res_model FROM dms_directory WHERE res_model IS NOT NULL"
+        )
+        return frozenset(row[0] for row in self.env.cr.fetchall())
+
+    @ormcache("access_token", "directory_id")
+    def _check_access_token_subtree(self, access_token, directory_id):
+        """Check if a directory is in the subtree shared by an access token.
+
+        The token is resolved through its index and the subtree through a
+        ``parent_path`` prefix test in a single query. Results are cached until
+        a token is changed or a directory is moved.
+        """
+        if not directory_id:
+            return False
+        self.flush_model(["access_token", "parent_id", "parent_path"])
+        self.env.cr.execute(
+            """
+            SELECT 1
+            FROM dms_directory token_directory
+            JOIN dms_directory directory
+                ON directory.parent_path LIKE token_directory.parent_path || '%%'
+            WHERE token_directory.access_token = %(access_token)s
+                AND directory.id = %(directory_id)s
+            LIMIT 1
+            """,
+            {"access_token": access_token, "directory_id": directory_id},
+        )
+        return bool(self.env.cr.fetchone())
 
     @api.model
     def _get_parent_categories(self, access_token):
@@ -283,15 +313,119 @@ class DmsDirectory(models.Model):
         return directories
 
     def _get_own_root_directories(self):
-        res = self.env["dms.directory"].search_read(
-            [("is_hidden", "=", False)], ["parent_id"]
+        """Get the ids of the visible directories whose parent is not visible."""
+        model = self.env["dms.directory"]
+        visible = model._search([("is_hidden", "=", False)]).subselect()
+        model.flush_model(["parent_id", "complete_name"])
+        rows = self.env.execute_query(
+            SQL(
+                """
+                SELECT d.id
+                FROM dms_directory d
+                WHERE d.id IN %(visible)s
+                    AND (d.parent_id IS NULL OR d.parent_id NOT IN %(visible)s)
+                ORDER BY d.complete_name, d.id
+                """,
+                visible=visible,
+            )
         )
-        all_ids = [value["id"] for value in res]
-        res_ids = []
-        for item in res:
-            if not item["parent_id"] or item["parent_id"][0] not in all_ids:
-                res_ids.append(item["id"])
-        return res_ids
+        return [row[0] for row in rows]
+
+    @api.model
+    def _get_ancestor_ids(self, directory_query):
+        """Get the ids of the directories and all their ancestors.
+
+        :param directory_query: Subquery selecting directory ids.
+        :type directory_query: odoo.tools.SQL
+        :return: The ids, taken from ``parent_path`` without loading records.
+        :rtype: list
+        """
+        self.flush_model(["parent_id", "parent_path"])
+        rows = self.env.execute_query(
+            SQL(
+                """
+                SELECT DISTINCT
+                    unnest(string_to_array(rtrim(d.parent_path, '/'), '/'))::integer
+                FROM dms_directory d
+                WHERE d.id IN %s
+                """,
+                directory_query,
+            )
+        )
+        return [row[0] for row in rows]
+
+    def _get_export_paths(self):
+        """Get the accessible subtrees of the directories for an archive export.
+
+        The subtrees are collected at once through ``parent_path``. Directories
+        below an inaccessible one are skipped so that the folder structure of
+        the archive never reveals names the user cannot read.
+
+        :return: Mapping of every exported directory id to its path in the
+            archive (ending with ``/``).
+        :rtype: dict
+        """
+        self.check_access("read")
+        if not self:
+            return {}
+        directories = self.search(
+            OR([[("parent_path", "=like", f"{item.parent_path}%")] for item in self])
+        )
+        names = {item.id: item.name for item in directories}
+        roots = {}
+        for item in self:
+            roots[item.id] = unique_name(item.name, list(roots.values()))
+        paths = {}
+        for item in directories:
+            chain = [int(part) for part in item.parent_path.split("/") if part]
+            start = next(index for index, part in enumerate(chain) if part in roots)
+            if any(part not in names for part in chain[start:]):
+                continue
+            components = [roots[chain[start]]]
+            components += [names[part] for part in chain[start + 1 :]]
+            paths[item.id] = "/".join(components) + "/"
+        return paths
+
+    def _get_ancestors(self):
+        """Get the chain of directories from the root for each directory.
+
+        Ancestor ids are taken from ``parent_path`` and the names of all the
+        ancestors of the recordset are loaded at once. Chains are memoized
+        until the end of the transaction or the next rename or move.
+
+        :return: Mapping of every saved directory id to its list of
+            ``(id, name)`` from the root down to the directory itself.
+        :rtype: dict
+        """
+        memo = self.env.cr.precommit.data.setdefault("dms.directory.ancestors", {})
+        missing = self.browse(
+            {record_id for record_id in self.ids if record_id and record_id not in memo}
+        ).sudo()
+        if missing:
+            self.flush_model(["parent_id"])
+            chains = {
+                item.id: [int(part) for part in item.parent_path.split("/") if part]
+                for item in missing
+            }
+            ancestors = self.sudo().browse(
+                {part for chain in chains.values() for part in chain}
+            )
+            names = {item.id: item.name for item in ancestors}
+            for directory_id, chain in chains.items():
+                memo[directory_id] = [(part, names[part]) for part in chain]
+        return {
+            record_id: memo[record_id]
+            for record_id in self.ids
+            if record_id and record_id in memo
+        }
+
+    def action_export_zip(self):
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/dms/export/zip?directory_ids=%s"
+            % ",".join(str(item_id) for item_id in self.ids),
+            "target": "self",
+        }
 
     allowed_model_ids = fields.Many2many(
         related="storage_id.model_ids",
@@ -357,6 +491,110 @@ class DmsDirectory(models.Model):
             DmsDirectory, self.with_context(category_short_name=True)
         ).search_panel_select_multi_range(field_name, **kwargs)
 
+    @api.model
+    def search_panel_children(
+        self, parent_ids, domain=None, file_domain=None, active_id=False
+    ):
+        """Load the directory tree of the search panel level by level.
+
+        The children of the expanded directories are returned together with
+        their own children, so that the panel knows which nodes can be
+        expanded. The ancestors of the active directory are expanded too.
+
+        :param list parent_ids: Ids of the expanded directories, ``False``
+            standing for the roots.
+        :param list domain: Domain of the directories shown in the panel.
+        :param list file_domain: Domain of the counted files, no file is
+            counted when ``None``.
+        :param int active_id: Id of the selected directory.
+        :return: The values of the loaded directories, with the number of
+            visible children and of files in their subtree, and the ids of the
+            directories whose children are now all loaded.
+        :rtype: dict
+        """
+        domain = AND([[("is_hidden", "=", False)], domain or []])
+        expanded = set(parent_ids)
+        if active_id:
+            chain = self.browse(active_id)._get_ancestors().get(active_id, [])
+            expanded.update(directory_id for directory_id, __ in chain)
+        fields_to_fetch = ["name", "parent_id"]
+        roots = self.browse()
+        if False in expanded:
+            roots = self.search_fetch(
+                AND([domain, [("parent_id", "not any", domain)]]), fields_to_fetch
+            )
+        found = roots | self.search_fetch(
+            AND([domain, [("parent_id", "in", [item for item in expanded if item])]]),
+            fields_to_fetch,
+        )
+        children = found | self.search_fetch(
+            AND([domain, [("parent_id", "in", found.ids)]]), fields_to_fetch
+        )
+        counts = children._get_search_panel_counts(domain, file_domain)
+        values = []
+        for record in children.with_context(directory_short_name=True):
+            child_count, file_count = counts.get(record.id, (0, 0))
+            values.append(
+                {
+                    "id": record.id,
+                    "display_name": record.display_name,
+                    # Directories whose parent is not visible are shown as roots
+                    "parent_id": record not in roots and record.parent_id.id,
+                    "child_count": child_count,
+                    "__count": file_count,
+                }
+            )
+        loaded = list(expanded | set(found.ids))
+        return {"parent_field": "parent_id", "values": values, "loaded": loaded}
+
+    def _get_search_panel_counts(self, domain, file_domain=None):
+        """Count the visible children and the files of the directories.
+
+        :return: Mapping of directory ids to the number of visible children
+            and of files in their whole subtree.
+        :rtype: dict
+        """
+        if not self:
+            return {}
+        self.flush_model(["parent_id", "parent_path"])
+        children = self._search(AND([domain, [("parent_id", "in", self.ids)]]))
+        file_model = self.env["dms.file"]
+        if file_domain is None:
+            files = SQL("(SELECT NULL::integer WHERE FALSE)")
+        else:
+            file_model.flush_model(["directory_id"])
+            files = file_model._search(
+                AND([file_domain, [("directory_id", "child_of", self.ids)]])
+            ).subselect()
+        rows = self.env.execute_query(
+            SQL(
+                """
+                SELECT
+                    parent.id,
+                    count(*) FILTER (WHERE item.parent_id = parent.id),
+                    count(*) FILTER (WHERE item.parent_id IS NULL)
+                FROM dms_directory parent
+                JOIN (
+                    SELECT parent_id, parent_path
+                    FROM dms_directory
+                    WHERE id IN %s
+                    UNION ALL
+                    SELECT NULL, directory.parent_path
+                    FROM dms_file
+                    JOIN dms_directory directory
+                        ON directory.id = dms_file.directory_id
+                    WHERE dms_file.id IN %s
+                ) item ON item.parent_path LIKE parent.parent_path || '%%'
+                WHERE parent.id = ANY(%s)
+                GROUP BY parent.id
+                """,
+                children.subselect(),
+                files,
+                self.ids,
+            )
+        )
+        return {row[0]: row[1:] for row in rows}
+
     # Actions
     def action_save_onboarding_directory_step(self):
         self.env.user.company_id.set_onboarding_step_done(
@@ -415,39 +653,54 @@ class DmsDirectory(models.Model):
 
     @api.depends("child_directory_ids")
     def _compute_count_directories(self):
+        counts = self._count_children("dms.directory", "parent_id")
         for record in self:
-            directories = len(record.child_directory_ids)
+            if isinstance(record.id, int):
+                directories = counts.get(record.id, 0)
+            else:
+                directories = len(record.child_directory_ids)
             record.count_directories = directories
             record.count_directories_title = _("%s Subdirectories") % directories
 
     @api.depends("file_ids")
     def _compute_count_files(self):
+        counts = self._count_children("dms.file", "directory_id")
         for record in self:
-            files = len(record.file_ids)
+            if isinstance(record.id, int):
+                files = counts.get(record.id, 0)
+            else:
+                files = len(record.file_ids)
             record.count_files = files
             record.count_files_title = _("%s Files") % files
 
+    def _count_children(self, model_name, field_name):
+        """Count the children of the saved directories without loading them.
+
+        :return: Mapping of directory ids to their number of children.
+        :rtype: dict
+        """
+        ids = [record_id for record_id in self.ids if isinstance(record_id, int)]
+        if not ids:
+            return {}
+        groups = self.env[model_name]._read_group(
+            [(field_name, "in", ids)], [field_name], ["__count"]
+        )
+        return {directory.id: count for directory, count in groups}
+
     @api.depends("child_directory_ids", "file_ids")
     def _compute_count_elements(self):
         for record in self:
             record.count_elements = record.count_files + record.count_directories
 
     def _compute_count_total_directories(self):
+        rollup = self._rollup_read()
         for record in self:
-            count = (
-                self.search_count([("id", "child_of", record.id)]) if record.id else 0
-            )
-            record.count_total_directories = count - 1 if count > 0 else 0
+            record.count_total_directories = rollup[record.id]["count_directories"]
 
     def _compute_count_total_files(self):
-        model = self.env["dms.file"]
+        rollup = self._rollup_read()
         for record in self:
-            # Prevent error in some NewId cases
-            record.count_total_files = (
-                model.search_count([("directory_id", "child_of", record.id)])
-                if record.id
-                else 0
-            )
+            record.count_total_files = rollup[record.id]["count_files"]
 
     def _compute_count_total_elements(self):
         for record in self:
@@ -456,36 +709,213 @@ class DmsDirectory(models.Model):
             )
 
     def _compute_size(self):
-        sudo_model = self.env["dms.file"].sudo()
+        rollup = self._rollup_read()
         for record in self:
-            # Avoid NewId
-            if not record.id:
-                record.size = 0
-                continue
-            recs = sudo_model.search_read(
-                domain=[("directory_id", "child_of", record.id)],
-                fields=["size"],
-            )
-            record.size = sum(rec.get("size", 0) for rec in recs)
+            record.size = rollup[record.id]["size"]
 
     @api.depends("size")
     def _compute_human_size(self):
         for item in self:
             item.human_size = human_size(item.size) if item.size else False
 
-    @api.depends(
-        "group_ids",
-        "inherit_group_ids",
-        "parent_id.complete_group_ids",
-        "parent_path",
-    )
+    @api.depends("group_ids", "inherit_group_ids", "parent_id")
     def _compute_groups(self):
-        """Get all DMS security groups affecting this directory."""
+        """Get all DMS security groups affecting this directory.
+
+        Subdirectories are not recomputed by the ORM, see
+        :meth:`_refresh_complete_groups`.
+        """
         for one in self:
             groups = one.group_ids
             if one.inherit_group_ids:
                 groups |= one.parent_id.complete_group_ids
-            self.complete_group_ids = groups
+            one.complete_group_ids = groups
+
+    def _refresh_complete_groups(self):
+        """Update the complete groups of the subtrees of the directories.
+
+        ``dms_directory_complete_groups_rel`` is the closure of the groups over
+        the tree. It is recomputed for the affected branches only, with a
+        recursive query, and updated with the difference.
+        """
+        if not self:
+            return
+        self.env.flush_all()
+        prefixes = [f"{path}%" for path in set(self.sudo().mapped("parent_path"))]
+        self.env.cr.execute(
+            """
+            WITH RECURSIVE branch AS (
+                SELECT id, parent_id, inherit_group_ids
+                FROM dms_directory
+                WHERE parent_path LIKE ANY(%(prefixes)s)
+            ), closure(aid, gid) AS (
+                SELECT b.id, g.gid
+                FROM branch b
+                JOIN dms_directory_groups_rel g ON g.aid = b.id
+                UNION
+                SELECT b.id, c.gid
+                FROM branch b
+                JOIN dms_directory_complete_groups_rel c ON c.aid = b.parent_id
+                WHERE b.inherit_group_ids
+                    AND b.parent_id NOT IN (SELECT id FROM branch)
+                UNION
+                SELECT b.id, closure.gid
+                FROM closure
+                JOIN branch b ON b.parent_id = closure.aid
+                WHERE b.inherit_group_ids
+            ), deleted AS (
+                DELETE FROM dms_directory_complete_groups_rel r
+                USING branch b
+                WHERE r.aid = b.id
+                    AND NOT EXISTS (
+                        SELECT 1
+                        FROM closure c
+                        WHERE c.aid = r.aid AND c.gid = r.gid
+                    )
+                RETURNING r.aid
+            ), inserted AS (
+                INSERT INTO dms_directory_complete_groups_rel (aid, gid)
+                SELECT aid, gid
+                FROM closure
+                ON CONFLICT DO NOTHING
+                RETURNING aid
+            )
+            SELECT aid FROM deleted
+            UNION
+            SELECT aid FROM inserted
+            """,
+            {"prefixes": prefixes},
+        )
+        changed_ids = [row[0] for row in self.env.cr.fetchall()]
+        if changed_ids:
+            self.browse(changed_ids).invalidate_recordset(["complete_group_ids"])
+            self.env["dms.access.group"].invalidate_model(["complete_directory_ids"])
+
+    # Rollup
+    def init(self):
+        super().init()
+        cr = self.env.cr
+        created = not sql.table_exists(cr, "dms_directory_rollup")
+        cr.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dms_directory_rollup (
+                directory_id integer PRIMARY KEY
+                    REFERENCES dms_directory(id) ON DELETE CASCADE,
+                count_files integer NOT NULL DEFAULT 0,
+                count_directories integer NOT NULL DEFAULT 0,
+                size double precision NOT NULL DEFAULT 0
+            )
+            """
+        )
+        if created and sql.table_exists(cr, "dms_file"):
+            self._rollup_rebuild()
+
+    @api.model
+    def _rollup_rebuild(self):
+        """
+        Recompute the recursive totals of every directory from scratch.
+
+        The ``dms_directory_rollup`` table is maintained incrementally, this is
+        only needed to initialize it or to repair it after raw SQL changes.
+        """
+        self.env.flush_all()
+        self.env.cr.execute("DELETE FROM dms_directory_rollup")
+        self.env.cr.execute(
+            """
+            WITH ancestors AS (
+                SELECT id AS directory_id,
+                    unnest(string_to_array(rtrim(parent_path, '/'), '/'))::integer
+                        AS ancestor_id
+                FROM dms_directory
+            ), files AS (
+                SELECT a.ancestor_id, COUNT(*) AS count_files, SUM(f.size) AS size
+                FROM dms_file f
+                JOIN ancestors a ON a.directory_id = f.directory_id
+                WHERE f.active
+                GROUP BY a.ancestor_id
+            ), directories AS (
+                SELECT ancestor_id, COUNT(*) - 1 AS count_directories
+                FROM ancestors
+                GROUP BY ancestor_id
+            )
+            INSERT INTO dms_directory_rollup
+                (directory_id, count_files, count_directories, size)
+            SELECT d.ancestor_id, COALESCE(f.count_files, 0), d.count_directories,
+                COALESCE(f.size, 0)
+            FROM directories d
+            LEFT JOIN files f ON f.ancestor_id = d.ancestor_id
+            """
+        )
+        self.invalidate_model(["count_total_directories", "count_total_files", "size"])
+
+    @api.model
+    def _rollup_apply(self, deltas):
+        """
+        Add deltas to the recursive totals of directories and their ancestors.
+
+        :param list deltas: Tuples ``(directory_id, files, directories, size)``
+        """
+        deltas = [delta for delta in deltas if delta[0] and any(delta[1:])]
+        if not deltas:
+            return
+        self.flush_model(["parent_id", "parent_path"])
+        directory_ids, files, directories, sizes = zip(*deltas, strict=True)
+        self.env.cr.execute(
+            """
+            INSERT INTO dms_directory_rollup AS r
+                (directory_id, count_files, count_directories, size)
+            SELECT t.ancestor_id, SUM(t.files), SUM(t.directories), SUM(t.size)
+            FROM (
+                SELECT unnest(string_to_array(rtrim(d.parent_path, '/'), '/'))::integer
+                        AS ancestor_id,
+                    delta.files, delta.directories, delta.size
+                FROM unnest(
+                    %(directory_ids)s::integer[],
+                    %(files)s::integer[],
+                    %(directories)s::integer[],
+                    %(sizes)s::double precision[]
+                ) AS delta(directory_id, files, directories, size)
+                JOIN dms_directory d ON d.id = delta.directory_id
+            ) AS t
+            GROUP BY t.ancestor_id
+            ORDER BY t.ancestor_id
+            ON CONFLICT (directory_id) DO UPDATE SET
+                count_files = r.count_files + EXCLUDED.count_files,
+                count_directories = r.count_directories + EXCLUDED.count_directories,
+                size = r.size + EXCLUDED.size
+            """,
+            {
+                "directory_ids": list(directory_ids),
+                "files": list(files),
+                "directories": list(directories),
+                "sizes": list(sizes),
+            },
+        )
+        self.invalidate_model(["count_total_directories", "count_total_files", "size"])
+
+    def _rollup_read(self):
+        """
+        Read the recursive totals of the directories in a single query.
+
+        :return: The totals by directory id, zero for new records.
+        :rtype: dict
+        """
+        result = defaultdict(
+            lambda: {"count_files": 0, "count_directories": 0, "size": 0.0}
+        )
+        ids = [record_id for record_id in self.ids if record_id]
+        if ids:
+            self.env.cr.execute(
+                """
+                SELECT directory_id, count_files, count_directories, size
+                FROM dms_directory_rollup
+                WHERE directory_id = ANY(%(ids)s)
+                """,
+                {"ids": ids},
+            )
+            for row in self.env.cr.dictfetchall():
+                result[row.pop("directory_id")] = row
+        return result
 
     # View
     @api.depends("is_root_directory")
@@ -567,11 +997,13 @@ class DmsDirectory(models.Model):
             if not record.is_root_directory and not record.parent_id:
                 raise ValidationError(_("A directory has to have a parent directory."))
 
-    @api.constrains("name")
+    @api.constrains("name", "active")
     def _check_name(self):
         for record in self:
             if self.env.context.get("check_name", True) and not check_name(record.name):
                 raise ValidationError(_("The directory name is invalid."))
+            if not record.active:
+                continue
             if record.is_root_directory:
                 children = record.sudo().storage_id.root_directory_ids
             else:
@@ -671,6 +1103,9 @@ class DmsDirectory(models.Model):
         ctx.update({"default_parent_id": False})
         self.env.registry.clear_cache()
         res = super(DmsDirectory, self.with_context(**ctx)).create(vals_list)
+        self._rollup_apply(
+            [(record.parent_id.id, 0, 1, 0.0) for record in res if record.parent_id]
+        )
         return res
 
     def write(self, vals):
@@ -691,15 +1126,44 @@ class DmsDirectory(models.Model):
                         )
                 elif old_storage_id != new_storage_id:
                     raise UserError(_("It is not possible to change the storage."))
+        moves = {}
+        if any(key in vals for key in ["parent_id", "is_root_directory"]):
+            rollup = self._rollup_read()
+            moves = {
+                record: (record.parent_id.id, rollup[record.id]) for record in self
+            }
+        res = super().write(vals)
+        if vals.get("res_model") and (
+            vals["res_model"] not in self._get_linked_res_models()
+        ):
+            self.env.registry.clear_cache()
         # Groups part
-        if any(key in vals for key in ["group_ids", "inherit_group_ids"]):
-            res = super().write(vals)
-            domain = [("id", "child_of", self.ids)]
-            records = self.sudo().search(domain)
-            records.modified(["group_ids"])
-            records.flush_recordset()
-        else:
-            res = super().write(vals)
+        if any(
+            key in vals
+            for key in [
+                "group_ids",
+                "inherit_group_ids",
+                "parent_id",
+                "is_root_directory",
+            ]
+        ):
+            self._refresh_complete_groups()
+        if any(key in vals for key in ["name", "parent_id", "is_root_directory"]):
+            self.env.cr.precommit.data.pop("dms.directory.ancestors", None)
+        if any(
+            key in vals for key in ["access_token", "parent_id", "is_root_directory"]
+        ):
+            self.env.registry.clear_cache()
+        deltas = []
+        for record, (old_parent_id, totals) in moves.items():
+            if record.parent_id.id == old_parent_id:
+                continue
+            files = totals["count_files"]
+            directories = totals["count_directories"] + 1
+            size = totals["size"]
+            deltas.append((old_parent_id, -files, -directories, -size))
+            deltas.append((record.parent_id.id, files, directories, size))
+        self._rollup_apply(deltas)
         return res
 
     @api.depends_context("directory_short_name")
@@ -714,12 +1178,97 @@ class DmsDirectory(models.Model):
         """Custom cascade unlink.
 
         Cannot rely on DB backend's cascade because subfolder and subfile unlinks
-        must check custom permissions implementation.
+        must check custom permissions implementation. The whole subtrees are
+        collected through ``parent_path`` and removed with one unlink of the
+        files and one of the directories, so that permissions are checked once
+        over each set.
+        """
+        subtree = self._get_subtree()
+        files = (
+            self.env["dms.file"]
+            .sudo()
+            .with_context(active_test=False)
+            .search([("directory_id", "in", subtree.ids)])
+        )
+        if files:
+            files.with_env(self.env).unlink()
+        subtree_ids = set(subtree.ids)
+        rollup = subtree._rollup_read()
+        subtree._rollup_apply(
+            [
+                (
+                    record.parent_id.id,
+                    -rollup[record.id]["count_files"],
+                    -rollup[record.id]["count_directories"] - 1,
+                    -rollup[record.id]["size"],
+                )
+                for record in subtree.sudo()
+                if record.parent_id and record.parent_id.id not in subtree_ids
+            ]
+        )
+        # Deepest directories come first so that no batch of the deletion
+        # removes a parent before its children.
+        return super(DmsDirectory, subtree).unlink()
+
+    def _get_subtree(self):
+        """Get the directories with all their descendants, deepest first.
+
+        :return: The directories of the subtrees.
+        :rtype: odoo.model.dms_directory
         """
-        self.file_ids.unlink()
-        if self.child_directory_ids:
-            self.child_directory_ids.unlink()
-        return super(DmsDirectory, self.exists()).unlink()
+        if not self:
+            return self
+        self.flush_model(["parent_id", "parent_path"])
+        prefixes = [f"{path}%" for path in set(self.sudo().mapped("parent_path"))]
+        self.env.cr.execute(
+            """
+            SELECT id
+            FROM dms_directory
+            WHERE parent_path LIKE ANY(%(prefixes)s)
+            ORDER BY length(parent_path) DESC, id
+            """,
+            {"prefixes": prefixes},
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def action_unlink_background(self):
+        """Schedule the deletion of the directories and of their content.
+
+        Permissions are checked right away, the records are then removed by a
+        cron job which commits after each batch of files.
+        """
+        subtree = self._get_subtree()
+        subtree._check_access_dms_record("unlink")
+        files = (
+            self.env["dms.file"]
+            .sudo()
+            .with_context(active_test=False)
+            .search([("directory_id", "in", subtree.ids)])
+        )
+        files.with_env(self.env)._check_access_dms_record("unlink")
+        self.sudo().write({"deletion_pending": True})
+        self.env.ref("dms.ir_cron_dms_directory_unlink")._trigger()
+
+    @api.model
+    def _cron_unlink_pending_directories(self, batch_size=1000):
+        cron = self.env["ir.cron"]
+        file_model = self.env["dms.file"].sudo().with_context(active_test=False)
+        for directory in self.sudo().search([("deletion_pending", "=", True)]):
+            # Removed along with another pending directory
+            if not directory.exists():
+                continue
+            subtree = directory._get_subtree()
+            domain = [("directory_id", "in", subtree.ids)]
+            remaining = file_model.search_count(domain)
+            while remaining:
+                files = file_model.search(domain, limit=batch_size)
+                files.unlink()
+                remaining = max(remaining - len(files), 0)
+                if cron._commit_progress(len(files), remaining=remaining) <= 0:
+                    return
+            subtree.unlink()
+            if cron._commit_progress(len(subtree)) <= 0:
+                return
 
     @api.model
     def _search_panel_domain_image(
@@ -0,0 +1,147 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import hashlib
+import logging
+
+from odoo import api, fields, models
+from odoo.tools import human_size
+
+_logger = logging.getLogger(__name__)
+
+
+class DmsBlob(models.Model):
+    """Content of the files saved in the database, shared by checksum.
+
+    Files with the same content reference the same blob. Blobs which are not
+    referenced anymore are removed by the autovacuum.
+    """
+
+    _name = "dms.blob"
+    _description = "File Content"
+    _log_access = False
+
+    checksum = fields.Char(string="Checksum/SHA1", required=True, readonly=True)
+    content = fields.Binary(attachment=False, prefetch=False, readonly=True)
+    size = fields.Integer(readonly=True)
+    file_ids = fields.One2many(
+        comodel_name="dms.file", inverse_name="blob_id", string="Files"
+    )
+    ref_count = fields.Integer(compute="_compute_ref_count", string="References")
+
+    _checksum_uniq = models.Constraint(
+        "unique (checksum)",
+        "A content can only be stored once!",
+    )
+
+    def _compute_ref_count(self):
+        files = self.env["dms.file"].with_context(active_test=False).sudo()
+        counts = dict(
+            files._read_group([("blob_id", "in", self.ids)], ["blob_id"], ["__count"])
+        )
+        for record in self:
+            record.ref_count = counts.get(record, 0)
+
+    @api.model
+    def _store(self, binary):
+        """Get the blob holding a content, creating it if needed.
+
+        :param bytes binary: The raw content.
+        :return: The id of the blob and whether it has just been created.
+        :rtype: tuple
+        """
+        self.env.cr.execute(
+            """
+            INSERT INTO dms_blob (checksum, content, size)
+            VALUES (%(checksum)s, %(content)s, %(size)s)
+            ON CONFLICT (checksum) DO UPDATE SET checksum = EXCLUDED.checksum
+            RETURNING id, xmax = 0
+            """,
+            {
+                "checksum": hashlib.sha1(binary).hexdigest(),
+                "content": binary,
+                "size": len(binary),
+            },
+        )
+        return self.env.cr.fetchone()
+
+    @api.model
+    def _deduplicate_contents(self, limit=100):
+        """Move the contents still saved on the files into shared blobs.
+
+        :param int limit: The maximum number of files to process.
+        :return: The number of files processed and the number of bytes
+            reclaimed by sharing an existing blob.
+        :rtype: tuple
+        """
+        file_model = self.env["dms.file"]
+        file_model.flush_model(["content_binary", "blob_id"])
+        self.env.cr.execute(
+            """
+            SELECT id, content_binary
+            FROM dms_file
+            WHERE content_binary IS NOT NULL
+            ORDER BY id
+            LIMIT %(limit)s
+            """,
+            {"limit": limit},
+        )
+        rows = self.env.cr.fetchall()
+        reclaimed = 0
+        for file_id, content in rows:
+            binary = bytes(content)
+            blob_id, created = self._store(binary)
+            if not created:
+                reclaimed += len(binary)
+            self.env.cr.execute(
+                """
+                UPDATE dms_file
+                SET blob_id = %(blob_id)s, content_binary = NULL
+                WHERE id = %(file_id)s
+                """,
+                {"blob_id": blob_id, "file_id": file_id},
+            )
+        file_model.invalidate_model(["content_binary", "blob_id"])
+        return len(rows), reclaimed
+
+    @api.model
+    def _cron_deduplicate_contents(self):
+        self.env.cr.execute(
+            "SELECT count(*) FROM dms_file WHERE content_binary IS NOT NULL"
+        )
+        remaining = self.env.cr.fetchone()[0]
+        cron = self.env["ir.cron"]
+        count = reclaimed = 0
+        while remaining:
+            processed, saved = self._deduplicate_contents()
+            if not processed:
+                break
+            count += processed
+            reclaimed += saved
+            remaining = max(remaining - processed, 0)
+            if cron._commit_progress(processed, remaining=remaining) <= 0:
+                break
+        if count:
+            _logger.info(
+                "Deduplicated the content of %s files, %s reclaimed",
+                count,
+                human_size(reclaimed),
+            )
+
+    @api.autovacuum
+    def _gc_unreferenced_blobs(self):
+        # Blobs locked by a running transaction may be about to be referenced
+        self.env.cr.execute(
+            """
+            DELETE FROM dms_blob
+            WHERE id IN (
+                SELECT blob.id
+                FROM dms_blob blob
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM dms_file WHERE dms_file.blob_id = blob.id
+                )
+                FOR UPDATE SKIP LOCKED
+            )
+            """
+        )
+        _logger.info("Removed %s unreferenced file contents", self.env.cr.rowcount)
@@ -0,0 +1,117 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import logging
+
+from psycopg2 import errors
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+class DmsColdContent(models.Model):
+    """Content kept in the cold storage of a storage, shared by checksum.
+
+    A row is reserved before a content is put in the cold storage. Files only
+    drop their reference to it, the content is deleted by the autovacuum once
+    no file references it anymore. Deleting the row and reserving it conflict
+    on the same row, so a content cannot be deleted while another transaction
+    moves a duplicate to the cold storage.
+    """
+
+    _name = "dms.cold.content"
+    _description = "Cold Content"
+    _log_access = False
+
+    storage_id = fields.Many2one(
+        comodel_name="dms.storage", required=True, readonly=True, ondelete="cascade"
+    )
+    checksum = fields.Char(string="Checksum/SHA1", required=True, readonly=True)
+
+    _storage_checksum_uniq = models.Constraint(
+        "unique (storage_id, checksum)",
+        "A content can only be stored once in a cold storage!",
+    )
+
+    @api.model
+    def _reserve(self, storage_id, checksum):
+        """Lock the row of a cold content, creating it if needed.
+
+        Must be called before the content is put in the cold storage.
+
+        :param int storage_id: The dms.storage holding the cold storage.
+        :param str checksum: The checksum of the content.
+        """
+        self.env.cr.execute(
+            """
+            INSERT INTO dms_cold_content (storage_id, checksum)
+            VALUES (%(storage_id)s, %(checksum)s)
+            ON CONFLICT (storage_id, checksum)
+            DO UPDATE SET checksum = EXCLUDED.checksum
+            """,
+            {"storage_id": storage_id, "checksum": checksum},
+        )
+
+    @api.model
+    def _gc_cold_contents_batch(self, limit=1000):
+        """Delete the cold contents which are not referenced by a file.
+
+        The row is deleted before the content. A concurrent reservation makes
+        the deletion fail with a serialization error, the content is then kept
+        and checked again by the next run.
+
+        :param int limit: The maximum number of contents to check.
+        :return: The number of deleted contents.
+        :rtype: int
+        """
+        self.env["dms.file"].flush_model(["cold_storage_id", "checksum"])
+        self.env.cr.execute(
+            """
+            SELECT cold.id
+            FROM dms_cold_content cold
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM dms_file
+                WHERE dms_file.cold_storage_id = cold.storage_id
+                    AND dms_file.checksum = cold.checksum
+            )
+            ORDER BY cold.id
+            LIMIT %(limit)s
+            """,
+            {"limit": limit},
+        )
+        deleted = 0
+        for cold in self.browse([row[0] for row in self.env.cr.fetchall()]):
+            store = cold.storage_id._get_cold_store()
+            if store is None:
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    self.env.cr.execute(
+                        """
+                        DELETE FROM dms_cold_content cold
+                        WHERE cold.id = %(id)s
+                            AND NOT EXISTS (
+                                SELECT 1
+                                FROM dms_file
+                                WHERE dms_file.cold_storage_id = cold.storage_id
+                                    AND dms_file.checksum = cold.checksum
+                            )
+                        RETURNING cold.checksum
+                        """,
+                        {"id": cold.id},
+                    )
+                    row = self.env.cr.fetchone()
+                    if row:
+                        store.delete(row[0])
+                        deleted += 1
+            except errors.SerializationFailure:
+                _logger.info("Cold content %s is in use, kept", cold.id)
+        self.invalidate_model()
+        return deleted
+
+    @api.autovacuum
+    def _gc_cold_contents(self):
+        deleted = self._gc_cold_contents_batch()
+        _logger.info("Removed %s unreferenced cold contents", deleted)
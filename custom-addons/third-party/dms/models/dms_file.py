@@ -6,6 +6,7 @@
 
 import base64
 import hashlib
+import io
 import json
 import logging
 from collections import defaultdict
@@ -13,12 +14,15 @@ from collections import defaultdict
 from PIL import Image
 
 from odoo import _, api, fields, models, tools
-from odoo.exceptions import UserError, ValidationError
+from odoo.exceptions import AccessError, UserError, ValidationError
+from odoo.http import Stream
 from odoo.osv import expression
-from odoo.tools import consteq, human_size
+from odoo.tools import SQL, consteq, human_size
 from odoo.tools.mimetypes import guess_mimetype
+from odoo.tools.sql import escape_psql
 
 from ..tools import file
+from ..tools.integrity import sha1_sources
 
 _logger = logging.getLogger(__name__)
 
@@ -54,6 +58,10 @@ class DMSFile(models.Model):
         index="btree",
         tracking=True,  # Leave log if "moved" to another directory
     )
+    _directory_name_uniq = models.UniqueIndex(
+        "(directory_id, name) WHERE active IS TRUE",
+        "A file with the same name already exists in this directory.",
+    )
     root_directory_id = fields.Many2one(related="directory_id.root_directory_id")
     # Override acording to defined in AbstractDmsMixin
     storage_id = fields.Many2one(
@@ -110,8 +118,28 @@ class DMSFile(models.Model):
 
     checksum = fields.Char(string="Checksum/SHA1", readonly=True, index="btree")
 
+    # Contents saved before the deduplication, moved to blob_id by a cron
     content_binary = fields.Binary(attachment=False, prefetch=False)
 
+    blob_id = fields.Many2one(
+        comodel_name="dms.blob",
+        string="Shared Content",
+        index="btree_not_null",
+        ondelete="restrict",
+        readonly=True,
+        prefetch=False,
+    )
+
+    cold_storage_id = fields.Many2one(
+        comodel_name="dms.storage",
+        string="Cold Storage",
+        index="btree_not_null",
+        ondelete="restrict",
+        readonly=True,
+        help="Set when the content has been moved to the cold storage of this storage.",
+    )
+    last_access_date = fields.Datetime(readonly=True, copy=False)
+
     save_type = fields.Char(
         compute="_compute_save_type",
         string="Current Save Type",
@@ -166,24 +194,9 @@ class DMSFile(models.Model):
         if self.access_token and consteq(self.access_token, access_token):
             return True
 
-        items = (
-            self.env["dms.directory"]
-            .sudo()
-            .search([("access_token", "=", access_token)])
+        return self.env["dms.directory"]._check_access_token_subtree(
+            access_token, self.directory_id.id
         )
-        if items:
-            item = items[0]
-            if self.directory_id.id == item.id:
-                return True
-            directory_item = self.directory_id
-            while directory_item.parent_id:
-                if directory_item.id == self.directory_id.id:
-                    return True
-                directory_item = directory_item.parent_id
-            # Fix last level
-            if directory_item.id == self.directory_id.id:
-                return True
-        return False
 
     res_model = fields.Char(
         string="Linked attachments model", related="directory_id.res_model"
@@ -209,7 +222,7 @@ class DMSFile(models.Model):
 
     @api.model
     def _get_content_inital_vals(self):
-        return {"content_binary": False, "content_file": False}
+        return {"content_binary": False, "content_file": False, "blob_id": False}
 
     def _update_content_vals(self, vals, binary):
         new_vals = vals.copy()
@@ -222,9 +235,278 @@ class DMSFile(models.Model):
         if self.storage_id.save_type in ["file", "attachment"]:
             new_vals["content_file"] = self.content
         else:
-            new_vals["content_binary"] = self.content and binary
+            new_vals["blob_id"] = self.content and self._get_blob_id(binary)
         return new_vals
 
+    @api.model
+    def _get_blob_id(self, binary):
+        if not binary:
+            return False
+        return self.env["dms.blob"].sudo()._store(binary)[0]
+
+    def _get_content_attachments(self):
+        """Get the attachments holding the content of the files.
+
+        :return: Mapping of file ids to the ``ir.attachment`` storing either
+            ``content_file`` or the linked attachment.
+        :rtype: dict
+        """
+        attachment_model = self.env["ir.attachment"].sudo()
+        result = {
+            record.id: record.sudo().attachment_id
+            for record in self
+            if record.sudo().attachment_id
+        }
+        field_attachments = attachment_model.search(
+            [
+                ("res_model", "=", self._name),
+                ("res_id", "in", self.ids),
+                ("res_field", "=", "content_file"),
+            ]
+        )
+        for attachment in field_attachments:
+            result[attachment.res_id] = attachment
+        return result
+
+    def _open_content(self, attachment=None):
+        """Open the raw content of the file as a binary file object.
+
+        Content kept in the filestore is read from disk so that it never has
+        to be loaded in memory at once.
+
+        :param attachment: The attachment holding the content, if known.
+        :return: A binary file object.
+        """
+        self.ensure_one()
+        if attachment is None:
+            attachment = self._get_content_attachments().get(self.id)
+        if attachment and attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), "rb")
+        if attachment:
+            return io.BytesIO(attachment.raw or b"")
+        record = self.sudo().with_context(bin_size=False)
+        if record.cold_storage_id:
+            return io.BytesIO(record._read_cold_content())
+        return io.BytesIO(record.blob_id.content or record.content_binary or b"")
+
+    def _get_content_stream(self):
+        """Get a stream serving the content of the file.
+
+        Contents kept in the filestore are sent from their path, which gives
+        conditional and range requests and the ``X-Accel-Redirect`` offload
+        when ``x_sendfile`` is enabled.
+
+        :return: The stream of the content.
+        :rtype: odoo.http.Stream
+        """
+        self.ensure_one()
+        attachment = self._get_content_attachments().get(self.id)
+        if attachment:
+            stream = Stream.from_attachment(attachment)
+        else:
+            record = self.sudo().with_context(bin_size=False)
+            if record.cold_storage_id:
+                data = record._read_cold_content()
+            else:
+                data = record.blob_id.content or record.content_binary or b""
+            stream = Stream(
+                type="data",
+                data=data,
+                size=len(data),
+                etag=self.checksum,
+                last_modified=self.write_date,
+            )
+        stream.mimetype = self.mimetype or "application/octet-stream"
+        stream.download_name = self.name
+        return stream
+
+    def _touch_last_access(self):
+        """Record that the contents have been read, at most once a day.
+
+        Only called where a user reads the contents, the reads of the system
+        (versions, indexing, computed fields) keep the files idle for the cold
+        storage policy.
+        """
+        ids = [id_ for id_ in self.ids if isinstance(id_, int)]
+        if not ids or self.env.cr.readonly:
+            return
+        self.env.cr.execute(
+            """
+            UPDATE dms_file
+            SET last_access_date = now() AT TIME ZONE 'UTC'
+            WHERE id = ANY(%(ids)s)
+                AND (
+                    last_access_date IS NULL
+                    OR last_access_date < now() AT TIME ZONE 'UTC' - interval '1 day'
+                )
+            """,
+            {"ids": ids},
+        )
+        self.invalidate_recordset(["last_access_date"])
+
+    def _read_cold_content(self):
+        self.ensure_one()
+        store = self.sudo().cold_storage_id._get_cold_store()
+        if store is None:
+            raise UserError(
+                _("The cold storage of the file %s is disabled.", self.display_name)
+            )
+        return store.get(self.checksum)
+
+    def _move_to_cold(self):
+        """Move the content of the file to the cold storage of its storage.
+
+        The copy is read back and checked against the checksum before the
+        content is dropped from the storage.
+        """
+        self.ensure_one()
+        store = self.storage_id._get_cold_store()
+        if store is None or self.storage_id.save_type == "attachment":
+            return
+        with self._open_content() as source:
+            binary = source.read()
+        checksum = self._get_checksum(binary)
+        if self.checksum and checksum != self.checksum:
+            raise ValidationError(
+                _("The content of the file %s is corrupted.", self.display_name)
+            )
+        # Reserved first so that the content cannot be collected meanwhile
+        self.env["dms.cold.content"].sudo()._reserve(self.storage_id.id, checksum)
+        store.put(checksum, binary)
+        if self._get_checksum(store.get(checksum)) != checksum:
+            raise ValidationError(
+                _("The copy of the file %s is corrupted.", self.display_name)
+            )
+        attachments = (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_id", "=", self.id),
+                    ("res_field", "=", "content_file"),
+                ]
+            )
+        )
+        # The content fields are cleared in SQL so that the fields computed
+        # from the content are not computed again
+        self.flush_recordset()
+        self.env.cr.execute(
+            """
+            UPDATE dms_file
+            SET cold_storage_id = %(storage_id)s,
+                checksum = %(checksum)s,
+                blob_id = NULL,
+                content_binary = NULL
+            WHERE id = %(file_id)s
+            """,
+            {
+                "storage_id": self.storage_id.id,
+                "checksum": checksum,
+                "file_id": self.id,
+            },
+        )
+        attachments.unlink()
+        self.invalidate_recordset(
+            ["cold_storage_id", "checksum", "blob_id", "content_binary", "content_file"]
+        )
+
+    def _restore_from_cold(self):
+        """Bring the content of the file back from the cold storage."""
+        self.ensure_one()
+        binary = self._read_cold_content()
+        if self._get_checksum(binary) != self.checksum:
+            raise ValidationError(
+                _("The copy of the file %s is corrupted.", self.display_name)
+            )
+        vals = self._get_content_inital_vals()
+        vals["cold_storage_id"] = False
+        if self.storage_id.save_type == "file":
+            vals["content_file"] = base64.b64encode(binary)
+        else:
+            vals["blob_id"] = self._get_blob_id(binary)
+        # The cold content is deleted by the autovacuum once unreferenced
+        self.write(vals)
+
+    @api.model
+    def _verify_contents(self, domain=None, batch_size=500, max_workers=None):
+        """Check that the contents of the files still match their checksum.
+
+        The contents are hashed in a thread pool, batch by batch. Cold
+        contents are checked when they are moved and are skipped.
+
+        :param list domain: Restrict the files to check.
+        :param int batch_size: Number of files loaded at once.
+        :param int max_workers: Number of threads hashing the contents.
+        :return: The mismatches, as dicts with the model, the id, the name, the
+            expected checksum and the computed one (``None`` when the file is
+            missing from the filestore).
+        :rtype: list
+        """
+        files = self.with_context(active_test=False, bin_size=False).sudo()
+        domain = expression.AND(
+            [domain or [], [("checksum", "!=", False), ("cold_storage_id", "=", False)]]
+        )
+        mismatches = []
+        last_id = 0
+        while True:
+            batch = files.search_fetch(
+                expression.AND([domain, [("id", ">", last_id)]]),
+                ["name", "checksum", "attachment_id", "blob_id"],
+                order="id",
+                limit=batch_size,
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            attachments = batch._get_content_attachments()
+            batch.blob_id.fetch(["content"])
+            sources = {}
+            for record in batch:
+                attachment = attachments.get(record.id)
+                if attachment and attachment.store_fname:
+                    sources[record.id] = attachment._full_path(attachment.store_fname)
+                elif attachment:
+                    sources[record.id] = attachment.raw
+                else:
+                    sources[record.id] = record.blob_id.content or record.content_binary
+            for record_id, digest in sha1_sources(sources, max_workers).items():
+                record = batch.browse(record_id)
+                if digest != record.checksum:
+                    mismatches.append(
+                        {
+                            "model": self._name,
+                            "id": record_id,
+                            "name": record.name,
+                            "checksum": record.checksum,
+                            "computed": digest,
+                        }
+                    )
+            batch.invalidate_recordset()
+        return mismatches
+
+    @api.model
+    def _cron_verify_contents(self):
+        mismatches = self._verify_contents()
+        for mismatch in mismatches:
+            _logger.error(
+                "The content of %s %s (%s) does not match its checksum %s: %s",
+                mismatch["model"],
+                mismatch["id"],
+                mismatch["name"],
+                mismatch["checksum"],
+                mismatch["computed"] or "missing",
+            )
+        return mismatches
+
+    def action_export_zip(self):
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/dms/export/zip?file_ids=%s"
+            % ",".join(str(item_id) for item_id in self.ids),
+            "target": "self",
+        }
+
     @api.model
     def _get_binary_max_size(self):
         return int(
@@ -258,11 +540,34 @@ class DMSFile(models.Model):
                     )
                 )
                 index += 1
-            dms_file.write(
-                {
-                    "content": dms_file.with_context(**{}).content,
-                    "storage_id": dms_file.directory_id.storage_id.id,
-                }
+            dms_file._migrate_content()
+
+    def _migrate_content(self):
+        """Copy the content of the file to the save type of its storage.
+
+        The raw content is read once, without going through the base64
+        encoded ``content`` field, and its SHA1 is checked against the stored
+        checksum before and after the copy.
+        """
+        self.ensure_one()
+        with self._open_content() as source:
+            binary = source.read()
+        checksum = self._get_checksum(binary)
+        if self.checksum and checksum != self.checksum:
+            raise ValidationError(
+                _("The content of the file %s is corrupted.", self.display_name)
+            )
+        vals = self._get_content_inital_vals()
+        vals["storage_id"] = self.directory_id.storage_id.id
+        if self.storage_id.save_type == "file":
+            vals["content_file"] = binary and base64.b64encode(binary)
+        else:
+            vals["blob_id"] = self._get_blob_id(binary)
+        self.write(vals)
+        attachment = self._get_content_attachments().get(self.id)
+        if attachment and attachment.checksum != checksum:
+            raise ValidationError(
+                _("The copy of the file %s is corrupted.", self.display_name)
             )
 
     def action_save_onboarding_file_step(self):
@@ -281,6 +586,62 @@ class DMSFile(models.Model):
         result["context"] = dict(self.env.context)
         return result
 
+    def _move_to_directory(self, directory):
+        """Move the files to another directory in a single write.
+
+        Name collisions with the target are checked with one query before the
+        write. The per-file tracking messages are replaced by notes logged on
+        the files in one batch and a single note posted on the target directory.
+
+        :param directory: The dms.directory receiving the files.
+        """
+        directory.ensure_one()
+        files = self.filtered(lambda rec: rec.directory_id != directory)
+        if not files:
+            return True
+        if not directory.permission_create:
+            raise AccessError(
+                _("You are not allowed to add files to the directory %s.")
+                % directory.display_name
+            )
+        names = files.filtered("active").mapped("name")
+        duplicates = {name for name in names if names.count(name) > 1}
+        self.flush_model(["name", "directory_id", "active"])
+        self.env.cr.execute(
+            """
+            SELECT name
+            FROM dms_file
+            WHERE directory_id = %(directory_id)s
+                AND active
+                AND name = ANY(%(names)s)
+                AND id != ALL(%(ids)s)
+            """,
+            {"directory_id": directory.id, "names": names, "ids": files.ids},
+        )
+        duplicates.update(name for (name,) in self.env.cr.fetchall())
+        if duplicates:
+            raise ValidationError(
+                _("Files with the same name already exist in the directory %s: %s")
+                % (directory.display_name, ", ".join(sorted(duplicates)))
+            )
+        bodies = {
+            record.id: _(
+                "Moved from %(source)s to %(target)s",
+                source=record.directory_id.display_name,
+                target=directory.display_name,
+            )
+            for record in files
+        }
+        files.with_context(tracking_disable=True).write({"directory_id": directory.id})
+        # The rights have been checked above, posting on the directory would
+        # require its write access
+        files.sudo()._message_log_batch(bodies)
+        directory.sudo().message_post(
+            body=_("%s files moved to this directory.") % len(files),
+            subtype_xmlid="mail.mt_note",
+        )
+        return True
+
     # SearchPanel
     @api.model
     def _search_panel_directory(self, **kwargs):
@@ -320,16 +681,34 @@ class DMSFile(models.Model):
         # the directories of the files, or we show all of them
         if self.env.context.get("active_model") == "dms.directory":
             active_id = self.env.context.get("active_id")
-            files = self.env["dms.file"].search(
+            files = self.env["dms.file"]._search(
                 [("directory_id", "child_of", active_id)]
             )
-            all_directory_ids = []
-            for file_record in files:
-                directory = file_record.directory_id
-                while directory:
-                    all_directory_ids.append(directory.id)
-                    directory = directory.parent_id
+            all_directory_ids = self.env["dms.directory"]._get_ancestor_ids(
+                SQL(
+                    "(SELECT directory_id FROM dms_file WHERE id IN %s)",
+                    files.subselect(),
+                )
+            )
             domain.append(("id", "in", all_directory_ids))
+        # The panel loads the tree level by level when it sends the expanded
+        # directories
+        if "dms_panel_parent_ids" in self.env.context:
+            file_domain = None
+            if kwargs.get("enable_counters"):
+                file_domain = expression.AND(
+                    [
+                        kwargs.get("search_domain") or [],
+                        kwargs.get("category_domain") or [],
+                        kwargs.get("filter_domain") or [],
+                    ]
+                )
+            return self.env["dms.directory"].search_panel_children(
+                self.env.context["dms_panel_parent_ids"],
+                domain=domain,
+                file_domain=file_domain,
+                active_id=self.env.context.get("dms_panel_active_id"),
+            )
         # Get all possible directories
         comodel_records = (
             self.env["dms.directory"]
@@ -401,27 +780,30 @@ class DMSFile(models.Model):
     @api.depends("name", "directory_id", "directory_id.parent_path")
     def _compute_path(self):
         model = self.env["dms.directory"]
+        ancestors = self.directory_id._get_ancestors()
         for record in self:
-            path_names = [record.display_name]
+            directory = record.directory_id
+            if directory.id in ancestors:
+                chain = ancestors[directory.id]
+            else:
+                # Unsaved directories have no parent_path yet
+                chain = []
+                current_dir = directory
+                while current_dir:
+                    chain.insert(0, (current_dir._origin.id, current_dir.name))
+                    current_dir = current_dir.parent_id
+            path_names = [name for __, name in chain] + [record.display_name]
             path_json = [
+                {"model": model._name, "name": name, "id": directory_id}
+                for directory_id, name in chain
+            ]
+            path_json.append(
                 {
                     "model": record._name,
                     "name": record.display_name,
                     "id": isinstance(record.id, int) and record.id or 0,
                 }
-            ]
-            current_dir = record.directory_id
-            while current_dir:
-                path_names.insert(0, current_dir.name)
-                path_json.insert(
-                    0,
-                    {
-                        "model": model._name,
-                        "name": current_dir.name,
-                        "id": current_dir._origin.id,
-                    },
-                )
-                current_dir = current_dir.parent_id
+            )
             record.update(
                 {
                     "path_names": "/".join(path_names) if all(path_names) else "",
@@ -447,18 +829,23 @@ class DMSFile(models.Model):
         for item in self:
             item.human_size = human_size(item.size)
 
-    @api.depends("content_binary", "content_file", "attachment_id")
+    @api.depends(
+        "content_binary", "blob_id", "content_file", "attachment_id", "cold_storage_id"
+    )
     def _compute_content(self):
         bin_size = self.env.context.get("bin_size", False)
         for record in self:
             if record.content_file:
                 context = {"human_size": True} if bin_size else {"base64": True}
                 record.content = record.with_context(**context).content_file
-            elif record.content_binary:
+            elif record.blob_id or record.content_binary:
+                content = record.blob_id.sudo().content or record.content_binary
+                record.content = content if bin_size else base64.b64encode(content)
+            elif record.cold_storage_id:
                 record.content = (
-                    record.content_binary
+                    human_size(record.size)
                     if bin_size
-                    else base64.b64encode(record.content_binary)
+                    else base64.b64encode(record._read_cold_content())
                 )
             elif record.attachment_id:
                 context = {"human_size": True} if bin_size else {"base64": True}
@@ -472,7 +859,7 @@ class DMSFile(models.Model):
             else:
                 record.save_type = "database"
 
-    @api.depends("storage_id", "storage_id.save_type")
+    @api.depends("storage_id", "storage_id.save_type", "cold_storage_id")
     def _compute_migration(self):
         storage_model = self.env["dms.storage"]
         save_field = storage_model._fields["save_type"]
@@ -480,7 +867,12 @@ class DMSFile(models.Model):
         selection = {value[0]: value[1] for value in values}
         for record in self:
             storage_type = record.storage_id.save_type
-            if storage_type == "attachment" or storage_type == record.save_type:
+            # Cold contents are restored in the current save type of the storage
+            if (
+                storage_type == "attachment"
+                or storage_type == record.save_type
+                or record.cold_storage_id
+            ):
                 record.migration = selection.get(storage_type)
                 record.require_migration = False
             else:
@@ -507,18 +899,35 @@ class DMSFile(models.Model):
                     _("A file must have model and resource ID in attachment storage.")
                 )
 
-    @api.constrains("name")
+    @api.constrains("name", "directory_id", "active")
     def _check_name(self):
-        for record in self:
-            if not file.check_name(record.name):
-                raise ValidationError(_("The file name is invalid."))
-            files = record.sudo().directory_id.file_ids
-            if files.filtered(
-                lambda file, record=record: file.name == record.name and file != record
-            ):
-                raise ValidationError(
-                    _("A file with the same name already exists in this directory.")
+        if self.filtered(lambda rec: not file.check_name(rec.name)):
+            raise ValidationError(_("The file name is invalid."))
+        # Enforced by the _directory_name_uniq index, checked first to get a
+        # readable error
+        self.flush_model(["name", "directory_id", "active"])
+        self.env.cr.execute(
+            """
+            SELECT 1
+            FROM dms_file record
+            WHERE record.id = ANY(%(ids)s)
+                AND record.active
+                AND EXISTS (
+                    SELECT 1
+                    FROM dms_file other
+                    WHERE other.directory_id = record.directory_id
+                        AND other.name = record.name
+                        AND other.id != record.id
+                        AND other.active
                 )
+            LIMIT 1
+            """,
+            {"ids": self.ids},
+        )
+        if self.env.cr.fetchone():
+            raise ValidationError(
+                _("A file with the same name already exists in this directory.")
+            )
 
     @api.constrains("extension")
     def _check_extension(self):
@@ -581,17 +990,75 @@ class DMSFile(models.Model):
             del res_vals["content"]
         return res_vals
 
+    def _get_rollup_deltas(self, sign=1):
+        """Contribution of the files to the totals of their directories."""
+        return [
+            (record.directory_id.id, sign, 0, sign * record.size)
+            for record in self
+            if record.active and record.directory_id
+        ]
+
     def copy_data(self, default=None):
         vals_list = super().copy_data(default)
         for dms_file, vals in zip(self, vals_list, strict=False):
-            if vals.get("directory_id"):
-                directory = self.env["dms.directory"].browse(vals.get("directory_id"))
-                names = directory.sudo().file_ids.mapped("name")
-            else:
-                names = dms_file.sudo().directory_id.file_ids.mapped("name")
+            names = self._get_colliding_names(
+                vals.get("directory_id") or dms_file.directory_id.id,
+                dms_file.name,
+                bool(dms_file.extension),
+            )
             vals["name"] = file.unique_name(dms_file.name, names, dms_file.extension)
         return vals_list
 
+    @api.model
+    def _get_colliding_names(self, directory_id, name, escape_suffix=False):
+        """Get the names of a directory that a unique version of a name could take.
+
+        :param int directory_id: The directory to look into.
+        :param str name: The original name.
+        :param bool escape_suffix: Whether the suffix goes before the extension.
+        :return: The names of the active files sharing the prefix of ``name``.
+        :rtype: set
+        """
+        self.flush_model(["name", "directory_id", "active"])
+        self.env.cr.execute(
+            """
+            SELECT name
+            FROM dms_file
+            WHERE directory_id = %(directory_id)s
+                AND active
+                AND name LIKE %(pattern)s
+            """,
+            {
+                "directory_id": directory_id,
+                "pattern": escape_psql(file.unique_name_prefix(name, escape_suffix))
+                + "%",
+            },
+        )
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    def _copy_to_directories(self, directories):
+        """Copy the files into each of the directories with a single create.
+
+        The copies reference the content of the originals, the shared blob of
+        the database storages is not read nor duplicated. The names are kept,
+        the directories are expected to be new ones.
+
+        :param directories: The dms.directory receiving a copy of every file.
+        :return: The new files.
+        """
+        if not self or not directories:
+            return self.browse()
+        vals_list = []
+        # The base implementation keeps the names, the target directories
+        # being empty no unique name has to be looked for
+        for record, vals in zip(self, super().copy_data(), strict=True):
+            # Computed from the content otherwise
+            vals.update(mimetype=record.mimetype, extension=record.extension)
+            vals_list += [
+                dict(vals, directory_id=directory.id) for directory in directories
+            ]
+        return self.create(vals_list)
+
     @api.model_create_multi
     def create(self, vals_list):
         new_vals_list = []
@@ -599,10 +1066,32 @@ class DMSFile(models.Model):
             if "attachment_id" not in vals:
                 vals = self._create_model_attachment(vals)
             new_vals_list.append(vals)
-        return super().create(new_vals_list)
+        # Content inverses write the size during the creation, the totals are
+        # only added once the records are complete.
+        records = super(DMSFile, self.with_context(dms_rollup_skip=True)).create(
+            new_vals_list
+        )
+        self.env["dms.directory"]._rollup_apply(records._get_rollup_deltas())
+        # Copies of cold files reference the same cold content
+        for record in records.sudo().filtered("cold_storage_id"):
+            self.env["dms.cold.content"].sudo()._reserve(
+                record.cold_storage_id.id, record.checksum
+            )
+        return records.with_env(self.env)
+
+    def write(self, vals):
+        rollup = not self.env.context.get("dms_rollup_skip") and any(
+            key in vals for key in ["directory_id", "size", "active"]
+        )
+        deltas = self._get_rollup_deltas(sign=-1) if rollup else []
+        res = super().write(vals)
+        if rollup:
+            self.env["dms.directory"]._rollup_apply(deltas + self._get_rollup_deltas())
+        return res
 
     def unlink(self):
         attachments = self.mapped("attachment_id")
+        self.env["dms.directory"]._rollup_apply(self._get_rollup_deltas(sign=-1))
         res = super().unlink()
         if not self.env.context.get("dms_file"):
             attachments.with_context(dms_file=True).unlink()
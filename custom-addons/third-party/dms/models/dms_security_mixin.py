@@ -9,15 +9,18 @@ from logging import getLogger
 from odoo import api, fields, models
 from odoo.exceptions import AccessError
 from odoo.osv.expression import (
+    AND,
     FALSE_DOMAIN,
     NEGATIVE_TERM_OPERATORS,
     OR,
     TRUE_DOMAIN,
 )
-from odoo.tools import SQL
+from odoo.tools import SQL, ormcache
 
 _logger = getLogger(__name__)
 
+PERMISSIONS = ("create", "read", "write", "unlink")
+
 
 class DmsSecurityMixin(models.AbstractModel):
     _name = "dms.security.mixin"
@@ -77,53 +80,182 @@ class DmsSecurityMixin(models.AbstractModel):
 
         # Update according to presence when applying ir.rule
         self.invalidate_recordset()
-        if self.env.su:
-            self.update(
-                {
-                    "permission_create": True,
-                    "permission_read": True,
-                    "permission_unlink": True,
-                    "permission_write": True,
-                }
-            )
-            return
-
-        creatable = self._filtered_access("create")
-        readable = self._filtered_access("read")
-        unlinkable = self._filtered_access("unlink")
-        writeable = self._filtered_access("write")
+        matrix = self._get_permission_matrix()
         for one in self:
+            permissions = matrix.get(one._origin.id, dict.fromkeys(PERMISSIONS, True))
             one.update(
                 {
-                    "permission_create": bool(one & creatable),
-                    "permission_read": bool(one & readable),
-                    "permission_unlink": bool(one & unlinkable),
-                    "permission_write": bool(one & writeable),
+                    f"permission_{operation}": permissions[operation]
+                    for operation in PERMISSIONS
                 }
             )
 
-    @api.model
-    def _get_domain_by_inheritance(self, operation):
-        """Get domain for inherited accessible records."""
+    def _get_permission_matrix(self):
+        """
+        Get the create, read, write and unlink permissions of the records.
+
+        The record rules of the four operations are evaluated side by side as
+        subqueries of a single query.
+
+        :return: Mapping of every saved record id to a dict with a boolean per
+            operation.
+        :rtype: dict
+        """
+        ids = [record_id for record_id in self._origin.ids if record_id]
+        if not ids:
+            return {}
         if self.env.su:
-            return []
+            return {record_id: dict.fromkeys(PERMISSIONS, True) for record_id in ids}
+        model = self.sudo().with_context(active_test=False)
+        column = SQL.identifier(self._table, "id")
+        columns = []
+        for operation in PERMISSIONS:
+            if not self.env["ir.model.access"].check(
+                self._name, operation, raise_exception=False
+            ):
+                columns.append(SQL("FALSE"))
+                continue
+            domain = self.env["ir.rule"]._compute_domain(self._name, operation)
+            if not domain:
+                columns.append(SQL("TRUE"))
+                continue
+            query = model._search(domain)
+            query.add_where(SQL("%s = ANY(%s)", column, ids))
+            columns.append(SQL("%s IN %s", column, query.subselect()))
+        rows = self.env.execute_query(
+            SQL(
+                "SELECT %s, %s FROM %s WHERE %s = ANY(%s)",
+                column,
+                SQL(", ").join(columns),
+                SQL.identifier(self._table),
+                column,
+                ids,
+            )
+        )
+        return {row[0]: dict(zip(PERMISSIONS, row[1:], strict=True)) for row in rows}
+
+    @api.model
+    def _get_inherited_access_domain(self):
+        """Get domain for records of storages inheriting access from records."""
         inherited_access_field = "storage_id_inherit_access_from_parent_record"
         if self._name != "dms.directory":
             inherited_access_field = f"{self._directory_field}.{inherited_access_field}"
-        inherited_access_domain = [
+        return [
             ("storage_id_save_type", "=", "attachment"),
             (inherited_access_field, "=", True),
         ]
-        domains = []
-        # Get all used related records
-        related_groups = self.sudo().read_group(
-            domain=inherited_access_domain + [("res_model", "!=", False)],
-            fields=["res_id:array_agg"],
+
+    @api.model
+    def _get_inherited_access_res_ids(self):
+        """Get all used related records, grouped by model.
+
+        The result does not depend on the user, it is cached across requests
+        for the current versions of the storages inheriting the access. A
+        version is increased when a record of the storage gets linked to a
+        model or a record that is not listed yet, which only invalidates this
+        cache in every worker.
+
+        :return: Tuples ``(res_model, res_ids)``.
+        :rtype: tuple
+        """
+        storage_model = self.env["dms.storage"]
+        storage_model.flush_model(
+            [
+                "save_type",
+                "inherit_access_from_parent_record",
+                "inherited_access_version",
+            ]
+        )
+        versions = self.env.execute_query(
+            SQL(
+                """
+                SELECT id, inherited_access_version
+                FROM %s
+                WHERE save_type = 'attachment'
+                    AND inherit_access_from_parent_record
+                ORDER BY id
+                """,
+                SQL.identifier(storage_model._table),
+            )
+        )
+        return self._get_inherited_access_res_ids_cached(tuple(map(tuple, versions)))
+
+    @api.model
+    @ormcache("versions")
+    def _get_inherited_access_res_ids_cached(self, versions):
+        related_groups = self.sudo()._read_group(
+            domain=self._get_inherited_access_domain() + [("res_model", "!=", False)],
             groupby=["res_model"],
+            aggregates=["res_id:array_agg"],
+        )
+        return tuple(
+            # Hack to remove None res_id
+            (res_model, frozenset(res_id for res_id in res_ids if res_id))
+            for res_model, res_ids in related_groups
+        )
+
+    @api.model
+    def _invalidate_inherited_access(self, storages=None):
+        """Forget the inherited access domains resolved in this transaction.
+
+        :param storages: The dms.storage whose related records cached across
+            requests are outdated, their version is increased.
+        """
+        self.env.cr.precommit.data.pop("dms.security.inheritance", None)
+        if storages:
+            storages.flush_recordset(["inherited_access_version"])
+            self.env.cr.execute(
+                SQL(
+                    """
+                    UPDATE %s
+                    SET inherited_access_version = inherited_access_version + 1
+                    WHERE id IN %s
+                    """,
+                    SQL.identifier(storages._table),
+                    tuple(storages.ids),
+                )
+            )
+            storages.invalidate_recordset(["inherited_access_version"])
+
+    def _check_inherited_access_res_ids(self):
+        """Invalidate the inherited access caches if the records are new in them."""
+        records = self.sudo().filtered(
+            lambda rec: rec.res_model
+            and rec.storage_id.save_type == "attachment"
+            and rec.storage_id.inherit_access_from_parent_record
         )
-        for group in related_groups:
+        if not records:
+            return
+        res_ids = dict(self._get_inherited_access_res_ids())
+        outdated = records.filtered(
+            lambda rec: rec.res_model not in res_ids
+            or (rec.res_id and rec.res_id not in res_ids[rec.res_model])
+        )
+        if outdated:
+            self._invalidate_inherited_access(outdated.storage_id)
+
+    @api.model
+    def _get_domain_by_inheritance(self, operation):
+        """Get domain for inherited accessible records.
+
+        The domain is resolved once per user, companies and operation in a
+        transaction.
+        """
+        if self.env.su:
+            return []
+        cache = self.env.cr.precommit.data.setdefault("dms.security.inheritance", {})
+        key = (self._name, self.env.uid, tuple(self.env.companies.ids), operation)
+        if key not in cache:
+            cache[key] = self._compute_domain_by_inheritance(operation)
+        return list(cache[key])
+
+    @api.model
+    def _compute_domain_by_inheritance(self, operation):
+        inherited_access_domain = self._get_inherited_access_domain()
+        domains = []
+        for res_model, res_ids in self._get_inherited_access_res_ids():
             try:
-                model = self.env[group["res_model"]]
+                model = self.env[res_model]
             except KeyError:
                 # The model might not be registered.
                 # This is normal if you are upgrading the database.
@@ -131,7 +263,7 @@ class DmsSecurityMixin(models.AbstractModel):
                 # These records will be accessible by DB users only.
                 domains.append(
                     [
-                        ("res_model", "=", group["res_model"]),
+                        ("res_model", "=", res_model),
                         (True, "=", self.env.user.has_group("base.group_user")),
                     ]
                 )
@@ -143,10 +275,9 @@ class DmsSecurityMixin(models.AbstractModel):
                 continue
             domains.append([("res_model", "=", model._name), ("res_id", "=", False)])
             # Check record access in batch too
-            res_ids = [i for i in group["res_id"] if i]  # Hack to remove None res_id
             # Apply exists to skip records that do not exist. (e.g. a res.partner
             # deleted by database).
-            model_records = model.browse(res_ids).exists()
+            model_records = model.browse(sorted(res_ids)).exists()
             related_ok = model_records._filtered_access(operation)
             if not related_ok:
                 continue
@@ -284,7 +415,9 @@ class DmsSecurityMixin(models.AbstractModel):
         if any(self._ids) and not self.env.su:
             Rule = self.env["ir.rule"]
             domain = Rule._compute_domain(self._name, operation)
-            items = self.search(domain)
+            items = self.with_context(active_test=False).search(
+                AND([domain, [("id", "in", self.ids)]])
+            )
             if any(x_id not in items.ids for x_id in self.ids):
                 raise Rule._make_access_error(operation, (self - items))
 
@@ -299,11 +432,15 @@ class DmsSecurityMixin(models.AbstractModel):
         # Go back to the original sudo state and check we really had creation permission
         res = res.sudo(self.env.su)
         res._check_access_dms_record("create")
+        res._check_inherited_access_res_ids()
         return res
 
     def write(self, vals):
         self._check_access_dms_record("write")
-        return super().write(vals)
+        res = super().write(vals)
+        if any(key in vals for key in ["res_model", "res_id", self._directory_field]):
+            self._check_inherited_access_res_ids()
+        return res
 
     def unlink(self):
         self._check_access_dms_record("unlink")
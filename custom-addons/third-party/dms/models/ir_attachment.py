@@ -1,7 +1,12 @@
 # Copyright 2021-2025 Tecnativa - Víctor Martínez
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import logging
+from collections import defaultdict
+
 from odoo import api, models
-from odoo.tools import ormcache
+from odoo.tools import SQL, ormcache
+
+_logger = logging.getLogger(__name__)
 
 
 class IrAttachment(models.Model):
@@ -18,22 +23,34 @@ class IrAttachment(models.Model):
         return self.env["dms.directory"].search(domain)
 
     def _dms_directories_create(self):
+        """Create the directories of the record of the attachment.
+
+        :return: The created directories.
+        :rtype: odoo.model.dms_directory
+        """
         items = self.sudo()._get_dms_directories(self.res_model, False)
-        for item in items:
-            model_item = self.env[self.res_model].browse(self.res_id)
-            ir_model_item = (
-                self.env["ir.model"].sudo().search([("model", "=", self.res_model)])
-            )
-            self.env["dms.directory"].sudo().with_context(check_name=False).create(
-                {
-                    "name": model_item.display_name,
-                    "model_id": ir_model_item.id,
-                    "res_model": self.res_model,
-                    "res_id": self.res_id,
-                    "parent_id": item.id,
-                    "storage_id": item.storage_id.id,
-                }
+        if not items:
+            return self.env["dms.directory"]
+        model_item = self.env[self.res_model].browse(self.res_id)
+        ir_model_item = self.env["ir.model"].sudo()._get(self.res_model)
+        return (
+            self.env["dms.directory"]
+            .sudo()
+            .with_context(check_name=False)
+            .create(
+                [
+                    {
+                        "name": model_item.display_name,
+                        "model_id": ir_model_item.id,
+                        "res_model": self.res_model,
+                        "res_id": self.res_id,
+                        "parent_id": item.id,
+                        "storage_id": item.storage_id.id,
+                    }
+                    for item in items
+                ]
             )
+        )
 
     @ormcache("model")
     def _dms_operations_from_model(self, model):
@@ -45,45 +62,57 @@ class IrAttachment(models.Model):
         """Perform the operation only if there is a storage with linked models.
         The directory (dms.directory) linked to the record (if it does not exist)
         and the file (dms.file) with the linked attachment would be created.
+
+        Attachments are grouped by record: the directories of each record are
+        resolved once and all the missing files are created at once.
         """
+        attachments_by_record = defaultdict(list)
         for attachment in self:
             if (
-                not attachment.res_model
-                or not attachment.res_id
-                or (
-                    attachment.res_model
-                    and not self._dms_operations_from_model(attachment.res_model)
-                )
+                attachment.res_model
+                and attachment.res_id
+                and self._dms_operations_from_model(attachment.res_model)
             ):
-                continue
-            directories = attachment._get_dms_directories(
-                attachment.res_model, attachment.res_id
-            )
+                key = (attachment.res_model, attachment.res_id)
+                attachments_by_record[key].append(attachment)
+        if not attachments_by_record:
+            return
+        directories_by_record = {}
+        for (res_model, res_id), attachments in attachments_by_record.items():
+            directories = attachments[0]._get_dms_directories(res_model, res_id)
             if not directories:
-                attachment._dms_directories_create()
-                # Get dms_directories again (with items previously created)
-                directories = attachment._get_dms_directories(
-                    attachment.res_model, attachment.res_id
-                )
-            # Auto-create_files (if not exists)
-            for directory in directories:
-                dms_file_model = self.env["dms.file"].sudo()
-                dms_file = dms_file_model.search(
-                    [
-                        ("attachment_id", "=", attachment.id),
-                        ("directory_id", "=", directory.id),
-                    ]
-                )
-                if not dms_file:
-                    dms_file_model.create(
-                        {
-                            "name": attachment.name,
-                            "directory_id": directory.id,
-                            "attachment_id": attachment.id,
-                            "res_model": attachment.res_model,
-                            "res_id": attachment.res_id,
-                        }
-                    )
+                directories = attachments[0]._dms_directories_create()
+            directories_by_record[res_model, res_id] = directories
+        # Auto-create_files (if not exists)
+        dms_file_model = self.env["dms.file"].sudo()
+        all_directories = self.env["dms.directory"].union(
+            *directories_by_record.values()
+        )
+        existing = {
+            (dms_file.attachment_id.id, dms_file.directory_id.id)
+            for dms_file in dms_file_model.search_fetch(
+                [
+                    ("attachment_id", "in", self.ids),
+                    ("directory_id", "in", all_directories.ids),
+                ],
+                ["attachment_id", "directory_id"],
+            )
+        }
+        vals_list = [
+            {
+                "name": attachment.name,
+                "directory_id": directory.id,
+                "attachment_id": attachment.id,
+                "res_model": attachment.res_model,
+                "res_id": attachment.res_id,
+            }
+            for key, attachments in attachments_by_record.items()
+            for attachment in attachments
+            for directory in directories_by_record[key]
+            if (attachment.id, directory.id) not in existing
+        ]
+        if vals_list:
+            dms_file_model.create(vals_list)
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -106,3 +135,55 @@ class IrAttachment(models.Model):
                 [("attachment_id", "in", self.ids)]
             ).with_context(dms_file=True).unlink()
         return super().unlink()
+
+    @api.model
+    def _get_dms_orphan_models(self):
+        """Get the models whose field attachments are collected once their
+        record is gone, e.g. removed by a cascade in the database."""
+        return ["dms.file"]
+
+    @api.model
+    def _gc_dms_orphan_attachments_batch(self, limit=1000):
+        """Remove the next field attachments whose record does not exist.
+
+        :param int limit: The maximum number of attachments to remove.
+        :return: The number of attachments removed.
+        :rtype: int
+        """
+        queries = [
+            SQL(
+                """
+                SELECT attachment.id
+                FROM ir_attachment attachment
+                WHERE attachment.res_model = %s
+                    AND attachment.res_field IS NOT NULL
+                    AND NOT EXISTS (
+                        SELECT 1 FROM %s record WHERE record.id = attachment.res_id
+                    )
+                """,
+                model,
+                SQL.identifier(self.env[model]._table),
+            )
+            for model in self._get_dms_orphan_models()
+        ]
+        rows = self.env.execute_query(
+            SQL(
+                "SELECT id FROM (%s) orphan ORDER BY id LIMIT %s",
+                SQL(" UNION ALL ").join(queries),
+                limit,
+            )
+        )
+        orphans = self.browse([row[0] for row in rows])
+        # The files are removed from the filestore by its own garbage collector
+        orphans.sudo().with_context(dms_file=True).unlink()
+        return len(rows)
+
+    @api.autovacuum
+    def _gc_dms_orphan_attachments(self):
+        cron = self.env["ir.cron"]
+        count = 0
+        while removed := self._gc_dms_orphan_attachments_batch():
+            count += removed
+            if cron._commit_progress(removed) <= 0:
+                break
+        _logger.info("Removed %s orphan DMS attachments", count)
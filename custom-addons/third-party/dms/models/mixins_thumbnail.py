@@ -3,6 +3,7 @@
 # Copyright 2024 Subteno - Timothée Vannier (https://www.subteno.com).
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import hashlib
 import os
 
 from odoo import api, fields, models
@@ -15,6 +16,8 @@ class Thumbnail(models.AbstractModel):
     _description = "DMS thumbnail and icon mixin"
 
     icon_url = fields.Char(string="Icon URL", compute="_compute_icon_url")
+    has_thumbnail = fields.Boolean(compute="_compute_thumbnail", store=True)
+    thumbnail_checksum = fields.Char(compute="_compute_thumbnail", store=True)
 
     def _get_icon_disk_path(self):
         """Get the local disk path to record icon."""
@@ -37,13 +40,25 @@ class Thumbnail(models.AbstractModel):
         icon_name = os.path.basename(local_path)
         return f"/dms/static/icons/{icon_name}"
 
-    @api.depends("image_128")
+    @api.depends("image_1920")
+    def _compute_thumbnail(self):
+        """Version the thumbnail when the image is saved, so that displaying
+        the records never reads the binary."""
+        for one in self.with_context(bin_size=False):
+            image = one.image_1920
+            one.has_thumbnail = bool(image)
+            one.thumbnail_checksum = image and hashlib.sha1(image).hexdigest()
+
+    @api.depends("has_thumbnail", "thumbnail_checksum")
     def _compute_icon_url(self):
         """Get icon static file URL."""
         for one in self:
-            # Get URL to thumbnail or to the default icon by file extension
+            # Get URL to thumbnail or to the default icon by file extension.
+            # The checksum makes the URL immutable so that the thumbnail is
+            # cached by the browser until the image changes.
             one.icon_url = (
-                f"/web/image/{one._name}/{one.id}/image_128/128x128?crop=1"
-                if one.image_128
+                f"/web/image/{one._name}/{one.id}/image_128/128x128"
+                f"?crop=1&unique={one.thumbnail_checksum}"
+                if one.has_thumbnail
                 else f"{one._get_icon_url()}?crop=1"
             )
@@ -0,0 +1,25 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, models
+
+
+class ResGroups(models.Model):
+    _inherit = "res.groups"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        groups = super().create(vals_list)
+        self.env["dms.access.group"].sudo()._update_users_membership(
+            groups.user_ids.ids
+        )
+        return groups
+
+    def write(self, vals):
+        if "user_ids" not in vals:
+            return super().write(vals)
+        user_ids = set(self.user_ids.ids)
+        res = super().write(vals)
+        user_ids.update(self.user_ids.ids)
+        self.env["dms.access.group"].sudo()._update_users_membership(list(user_ids))
+        return res
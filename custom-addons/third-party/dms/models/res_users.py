@@ -0,0 +1,20 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, models
+
+
+class ResUsers(models.Model):
+    _inherit = "res.users"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        users = super().create(vals_list)
+        self.env["dms.access.group"].sudo()._update_users_membership(users.ids)
+        return users
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "group_ids" in vals:
+            self.env["dms.access.group"].sudo()._update_users_membership(self.ids)
+        return res
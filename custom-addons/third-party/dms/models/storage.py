@@ -4,9 +4,15 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 import logging
+import os
+from datetime import timedelta
 
 from odoo import _, api, fields, models
-from odoo.exceptions import AccessError
+from odoo.exceptions import AccessError, UserError
+from odoo.osv.expression import AND, FALSE_DOMAIN, OR
+from odoo.tools import config
+
+from ..tools.cold_storage import LocalColdStore, S3ColdStore
 
 _logger = logging.getLogger(__name__)
 
@@ -75,6 +81,9 @@ class Storage(models.Model):
         "related model access (for example, if some directories are related "
         "with any sale, only users with read access to these sale can access)",
     )
+    # Increased when the related records cached for the inherited access
+    # are outdated
+    inherited_access_version = fields.Integer(readonly=True, copy=False)
     include_message_attachments = fields.Boolean(
         string="Create files from message attachments",
         default=False,
@@ -82,6 +91,61 @@ class Storage(models.Model):
         "composition process too",
     )
     model = fields.Char(search="_search_model", store=False)
+    migration_state = fields.Selection(
+        selection=[
+            ("draft", "Not Started"),
+            ("running", "Running"),
+            ("paused", "Paused"),
+            ("done", "Done"),
+        ],
+        default="draft",
+        required=True,
+        readonly=True,
+        copy=False,
+    )
+    migration_batch_size = fields.Integer(
+        default=100,
+        help="Number of files migrated and committed at once by the migration job.",
+    )
+    migration_checkpoint = fields.Integer(
+        readonly=True,
+        copy=False,
+        help="Id of the last file processed by the migration job.",
+    )
+    migration_total = fields.Integer(
+        string="Files to Migrate", readonly=True, copy=False
+    )
+    migration_done = fields.Integer(string="Migrated Files", readonly=True, copy=False)
+    migration_errors = fields.Integer(
+        string="Migration Errors", readonly=True, copy=False
+    )
+    cold_backend = fields.Selection(
+        selection=[
+            ("none", "Disabled"),
+            ("local", "Local Directory"),
+            ("s3", "S3 Compatible"),
+        ],
+        string="Cold Storage",
+        default="none",
+        required=True,
+        help="Where the contents which are not accessed anymore are moved. They "
+        "are compressed and read back transparently.",
+    )
+    cold_after_days = fields.Integer(
+        string="Cold After (Days)",
+        default=730,
+        help="Contents which have not been accessed for this number of days are "
+        "moved to the cold storage. 0 keeps all the contents in the storage.",
+    )
+    cold_path = fields.Char(
+        string="Cold Storage Directory",
+        groups="base.group_system",
+        help="Defaults to a folder of the data directory.",
+    )
+    cold_endpoint = fields.Char(string="S3 Endpoint", groups="base.group_system")
+    cold_bucket = fields.Char(string="S3 Bucket", groups="base.group_system")
+    cold_access_key = fields.Char(string="S3 Access Key", groups="base.group_system")
+    cold_secret_key = fields.Char(string="S3 Secret Key", groups="base.group_system")
 
     def _search_model(self, operator, value):
         allowed_items = self.env["ir.model"].sudo().search([("model", operator, value)])
@@ -95,17 +159,217 @@ class Storage(models.Model):
 
     # Actions
     def action_storage_migrate(self):
-        if self.save_type != "attachment":
-            if not self.env.user.has_group("dms.group_dms_manager"):
-                raise AccessError(_("Only managers can execute this action."))
-            files = self.env["dms.file"].with_context(active_test=False).sudo()
+        """Start the migration of the files to the save type of the storage.
 
-            for record in self:
-                domain = [
-                    ("require_migration", "=", True),
-                    ("storage_id", "=", record.id),
+        Small migrations are done at once, bigger ones are left to the
+        migration job which commits after each batch.
+        """
+        storages = self.filtered(lambda storage: storage.save_type != "attachment")
+        if not storages:
+            return
+        if not self.env.user.has_group("dms.group_dms_manager"):
+            raise AccessError(_("Only managers can execute this action."))
+        files = self.env["dms.file"].with_context(active_test=False).sudo()
+        for record in storages.sudo():
+            record.write(
+                {
+                    "migration_state": "running",
+                    "migration_checkpoint": 0,
+                    "migration_done": 0,
+                    "migration_errors": 0,
+                    "migration_total": files.search_count(
+                        record._get_migration_domain(0)
+                    ),
+                }
+            )
+            if record.migration_total <= record.migration_batch_size:
+                record._migrate_files_batch()
+            else:
+                self.env.ref("dms.ir_cron_dms_storage_migration")._trigger()
+
+    def action_storage_migrate_pause(self):
+        if not self.env.user.has_group("dms.group_dms_manager"):
+            raise AccessError(_("Only managers can execute this action."))
+        if any(record.migration_state != "running" for record in self):
+            raise UserError(_("Only running migrations can be paused."))
+        self.write({"migration_state": "paused"})
+
+    def action_storage_migrate_resume(self):
+        if not self.env.user.has_group("dms.group_dms_manager"):
+            raise AccessError(_("Only managers can execute this action."))
+        if any(record.migration_state != "paused" for record in self):
+            raise UserError(_("Only paused migrations can be resumed."))
+        self.write({"migration_state": "running"})
+        self.env.ref("dms.ir_cron_dms_storage_migration")._trigger()
+
+    def _get_migration_domain(self, checkpoint):
+        self.ensure_one()
+        return [
+            ("require_migration", "=", True),
+            ("storage_id", "=", self.id),
+            ("id", ">", checkpoint),
+        ]
+
+    def _migrate_files_batch(self):
+        """Migrate the next batch of files following the checkpoint.
+
+        Each file is migrated in its own savepoint: a file which fails is
+        counted as an error and skipped, the migration goes on with the next
+        ones.
+
+        :return: The number of files processed and the number of files left.
+        :rtype: tuple
+        """
+        self.ensure_one()
+        files = self.env["dms.file"].with_context(active_test=False).sudo()
+        batch = files.search(
+            self._get_migration_domain(self.migration_checkpoint),
+            order="id",
+            limit=max(self.migration_batch_size, 1),
+        )
+        errors = 0
+        for dms_file in batch:
+            try:
+                with self.env.cr.savepoint():
+                    dms_file._migrate_content()
+            except Exception:
+                _logger.exception("Migration of the file %s failed", dms_file.id)
+                errors += 1
+        checkpoint = batch[-1:].id or self.migration_checkpoint
+        remaining = files.search_count(self._get_migration_domain(checkpoint))
+        self.write(
+            {
+                "migration_checkpoint": checkpoint,
+                "migration_done": self.migration_done + len(batch) - errors,
+                "migration_errors": self.migration_errors + errors,
+                "migration_state": "running" if remaining else "done",
+            }
+        )
+        return len(batch), remaining
+
+    @api.model
+    def _cron_migrate_files(self):
+        cron = self.env["ir.cron"]
+        for storage in self.search([("migration_state", "=", "running")]):
+            while True:
+                processed, remaining = storage._migrate_files_batch()
+                time_left = cron._commit_progress(processed, remaining=remaining)
+                # the migration may have been paused in the meantime
+                storage.invalidate_recordset(["migration_state"])
+                if storage.migration_state != "running" or time_left <= 0:
+                    break
+
+    def _get_cold_store(self):
+        """Get the store holding the cold contents of the storage.
+
+        :return: The cold store, ``None`` when the storage has none.
+        """
+        self.ensure_one()
+        record = self.sudo()
+        if record.cold_backend == "local":
+            return LocalColdStore(
+                record.cold_path
+                or os.path.join(config["data_dir"], "dms_cold", self.env.cr.dbname)
+            )
+        if record.cold_backend == "s3":
+            try:
+                return S3ColdStore(
+                    record.cold_endpoint,
+                    record.cold_bucket,
+                    access_key=record.cold_access_key,
+                    secret_key=record.cold_secret_key,
+                )
+            except ImportError as error:
+                raise UserError(str(error)) from error
+        return None
+
+    def _get_cold_policies(self):
+        """Get the delays after which the files of the storage get cold.
+
+        :return: Pairs of a domain on dms.file and a number of days, a delay
+            of 0 keeping the matching files in the storage. The domains must
+            not overlap.
+        :rtype: list
+        """
+        self.ensure_one()
+        return [([], self.cold_after_days)]
+
+    def _get_cold_policy_domain(self, cold):
+        """Get the files of the storage which should be moved to the cold
+        storage, or restored from it when ``cold`` is false."""
+        self.ensure_one()
+        now = fields.Datetime.now()
+        domains = []
+        for domain, days in self._get_cold_policies():
+            if days <= 0:
+                continue
+            cutoff = now - timedelta(days=days)
+            if cold:
+                idle = [
+                    "|",
+                    ("last_access_date", "<", cutoff),
+                    "&",
+                    ("last_access_date", "=", False),
+                    ("write_date", "<", cutoff),
                 ]
-                files.search(domain).action_migrate()
+            else:
+                idle = [("last_access_date", ">=", cutoff)]
+            domains.append(AND([domain, idle]))
+        if not domains:
+            return FALSE_DOMAIN
+        if cold:
+            base_domain = [
+                ("storage_id", "=", self.id),
+                ("cold_storage_id", "=", False),
+                ("require_migration", "=", False),
+            ]
+        else:
+            base_domain = [("cold_storage_id", "=", self.id)]
+        return AND([base_domain, OR(domains)])
+
+    def _tier_files_batch(self):
+        """Move the next idle files to the cold storage, after restoring the
+        cold files which have been accessed again.
+
+        Each file is processed in its own savepoint, a file which fails is
+        skipped.
+
+        :return: The number of files processed and the number of files left.
+        :rtype: tuple
+        """
+        self.ensure_one()
+        files = self.env["dms.file"].with_context(active_test=False).sudo()
+        limit = max(self.migration_batch_size, 1)
+        warm_domain = self._get_cold_policy_domain(cold=False)
+        cold_domain = self._get_cold_policy_domain(cold=True)
+        warm = files.search(warm_domain, order="id", limit=limit)
+        cold = files.browse()
+        if len(warm) < limit:
+            cold = files.search(cold_domain, order="id", limit=limit - len(warm))
+        processed = 0
+        for dms_file in warm | cold:
+            try:
+                with self.env.cr.savepoint():
+                    if dms_file in warm:
+                        dms_file._restore_from_cold()
+                    else:
+                        dms_file._move_to_cold()
+                processed += 1
+            except Exception:
+                _logger.exception("Tiering of the file %s failed", dms_file.id)
+        remaining = files.search_count(OR([warm_domain, cold_domain]))
+        return processed, remaining
+
+    @api.model
+    def _cron_tier_files(self):
+        cron = self.env["ir.cron"]
+        for storage in self.search([("cold_backend", "!=", "none")]):
+            while True:
+                processed, remaining = storage._tier_files_batch()
+                if not processed:
+                    break
+                if cron._commit_progress(processed, remaining=remaining) <= 0:
+                    return
 
     def action_save_onboarding_storage_step(self):
         self.env.user.company_id.set_onboarding_step_done(
@@ -124,7 +388,23 @@ class Storage(models.Model):
             record.count_storage_files = len(record.storage_file_ids)
 
     def write(self, values):
+        if any(
+            key in values
+            for key in ["cold_backend", "cold_path", "cold_endpoint", "cold_bucket"]
+        ):
+            files = self.env["dms.file"].with_context(active_test=False).sudo()
+            if files.search_count([("cold_storage_id", "in", self.ids)], limit=1):
+                raise UserError(
+                    _(
+                        "The cold storage cannot be changed while it still holds "
+                        "contents."
+                    )
+                )
         res = super().write(values)
         if "model_ids" in values:
             self.env.registry.clear_cache()
+        if any(
+            key in values for key in ["save_type", "inherit_access_from_parent_record"]
+        ):
+            self.env["dms.security.mixin"]._invalidate_inherited_access(self)
         return res
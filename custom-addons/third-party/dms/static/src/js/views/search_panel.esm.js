@@ -11,8 +11,13 @@
 //   replace the operator for DMS models, avoiding duplicate domain entries.
 
 import {SearchModel} from "@web/search/search_model";
+import {SearchPanel} from "@web/search/search_panel/search_panel";
 import {patch} from "@web/core/utils/patch";
 
+// Stands for the children of a directory which are not loaded yet, so that the
+// panel shows the directory as expandable.
+const DMS_UNLOADED_CHILD = "dms_unloaded";
+
 patch(SearchModel.prototype, {
     _getCategoryDomain(excludedCategoryId) {
         if (!this.resModel || !this.resModel.startsWith("dms")) {
@@ -49,4 +54,111 @@ patch(SearchModel.prototype, {
 
         return domain;
     },
+
+    // The directory panel of the files is loaded level by level: only the
+    // children of the expanded directories are requested, and the levels
+    // already received are kept until the search changes.
+    _isDmsLazyCategory(category) {
+        return this.resModel === "dms.file" && category.fieldName === "directory_id";
+    },
+
+    _getDmsPanelCache(category) {
+        if (!this.dmsPanelCaches) {
+            this.dmsPanelCaches = new Map();
+        }
+        const key = JSON.stringify([this.query, this._getFilterDomain()]);
+        let cache = this.dmsPanelCaches.get(category.id);
+        if (!cache || cache.key !== key) {
+            cache = {key, values: new Map(), loaded: new Set()};
+            this.dmsPanelCaches.set(category.id, cache);
+        }
+        return cache;
+    },
+
+    async _fetchCategories(categories, expandedIds = []) {
+        const category = categories.find((item) => this._isDmsLazyCategory(item));
+        if (!category) {
+            return super._fetchCategories(...arguments);
+        }
+        const cache = this._getDmsPanelCache(category);
+        const activeId = category.activeValueId || false;
+        const parentIds = [false, activeId, ...expandedIds].filter(
+            (parentId) => !cache.loaded.has(parentId)
+        );
+        if (!parentIds.length) {
+            const others = categories.filter((item) => item !== category);
+            const promise = super._fetchCategories(others);
+            this._createCategoryTree(category.id, {
+                parent_field: "parent_id",
+                values: [],
+                loaded: [],
+            });
+            return promise;
+        }
+        // The arguments of the RPC are built synchronously, the context only
+        // needs to be swapped while calling super.
+        const context = this.globalContext;
+        this.globalContext = {
+            ...context,
+            dms_panel_parent_ids: [...new Set(parentIds)],
+            dms_panel_active_id: cache.values.has(activeId) ? false : activeId,
+        };
+        try {
+            return super._fetchCategories(...arguments);
+        } finally {
+            this.globalContext = context;
+        }
+    },
+
+    isDmsCategoryValueLoaded(sectionId, valueId) {
+        const category = this.sections.get(sectionId);
+        return (
+            !this._isDmsLazyCategory(category) ||
+            this._getDmsPanelCache(category).loaded.has(valueId)
+        );
+    },
+
+    async loadDmsCategoryChildren(sectionId, valueId) {
+        // The selected directory is kept, only the tree is extended
+        const category = this.sections.get(sectionId);
+        await this._fetchCategories([category], [valueId]);
+    },
+
+    _createCategoryTree(sectionId, result) {
+        const category = this.sections.get(sectionId);
+        if (!this._isDmsLazyCategory(category) || !result.loaded) {
+            return super._createCategoryTree(...arguments);
+        }
+        const cache = this._getDmsPanelCache(category);
+        for (const value of result.values) {
+            cache.values.set(value.id, value);
+        }
+        for (const parentId of result.loaded) {
+            cache.loaded.add(parentId);
+        }
+        const tree = super._createCategoryTree(sectionId, {
+            ...result,
+            values: [...cache.values.values()],
+        });
+        for (const value of category.values.values()) {
+            if (value.child_count && !cache.loaded.has(value.id)) {
+                value.childrenIds = [DMS_UNLOADED_CHILD];
+            }
+        }
+        return tree;
+    },
+});
+
+patch(SearchPanel.prototype, {
+    async toggleCategory(category, value) {
+        const searchModel = this.env.searchModel;
+        if (!searchModel.isDmsCategoryValueLoaded(category.id, value.id)) {
+            // The children are loaded before the directory is expanded, the
+            // tree is rebuilt with new values
+            await searchModel.loadDmsCategoryChildren(category.id, value.id);
+            category = searchModel.sections.get(category.id);
+            value = category.values.get(value.id);
+        }
+        return super.toggleCategory(category, value);
+    },
 });
@@ -5,3 +5,5 @@ from . import test_file_database
 from . import test_file
 from . import test_benchmark
 from . import test_portal
+from . import test_export
+from . import test_download
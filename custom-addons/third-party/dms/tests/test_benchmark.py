@@ -1,95 +1,223 @@
 # Copyright 2017-2019 MuK IT GmbH.
 # Copyright 2020 Creu Blanca
 # Copyright 2024 Subteno - Timothée Vannier (https://www.subteno.com).
+# Copyright 2025 ISIC Rabat
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-import cProfile
+import base64
+import json
 import logging
 import os
-import unittest
-import warnings
-from functools import wraps
+import time
+import tracemalloc
 
-from odoo.tests import common, tagged
-from odoo.tools import convert_file
-
-from .common import track_function
+from odoo.tests import common, new_test_user, tagged
 
 _logger = logging.getLogger(__name__)
 
+# The size of the corpus can be raised from the environment, e.g.
+# DMS_BENCHMARK_FILES=100000 DMS_BENCHMARK_DIRECTORIES=10000
+# DMS_BENCHMARK_DEPTH=12 DMS_BENCHMARK_GROUPS=500
+CORPUS_DEFAULTS = {
+    "files": 2000,
+    "directories": 200,
+    "depth": 6,
+    "groups": 20,
+    "batch": 100,
+}
+CREATE_BATCH_SIZE = 1000
 
-class profile:
-    def __init__(self, fname=None):
-        warnings.warn("Since 16.0.", DeprecationWarning, stacklevel=2)
-        self.fname = fname
-
-    def __call__(self, f):
-        @wraps(f)
-        def wrapper(*args, **kwargs):
-            profile = cProfile.Profile()
-            result = profile.runcall(f, *args, **kwargs)
-            profile.dump_stats(self.fname or (f"{f.__name__}.cprof"))
-            return result
 
-        return wrapper
+def _corpus_size(key):
+    return int(os.environ.get(f"DMS_BENCHMARK_{key.upper()}", CORPUS_DEFAULTS[key]))
 
 
 # This tests will only be executed if --test-tags benchmark is defined
 @tagged("-standard", "benchmark")
 class BenchmarkTestCase(common.TransactionCase):
+    """Measure the main DMS operations on a synthetic corpus.
+
+    Each measure records the number of queries, the wall time and the peak of
+    memory allocated by Python. The measures are logged and, when the
+    ``DMS_BENCHMARK_REPORT`` environment variable gives a path, written there
+    as JSON so that runs can be compared across commits. The memory tracing
+    slows the measured code down, the wall times are only comparable between
+    runs of this benchmark.
+    """
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        cls._clean_existing_records()
+        cls.env = cls.env(
+            context=dict(
+                cls.env.context,
+                tracking_disable=True,
+                mail_create_nolog=True,
+                mail_create_nosubscribe=True,
+            )
+        )
+        cls.corpus = {key: _corpus_size(key) for key in CORPUS_DEFAULTS}
+        cls.report = {"corpus": dict(cls.corpus), "results": {}}
+        cls.user = new_test_user(
+            cls.env, login="dms-benchmark-user", groups="dms.group_dms_user"
+        )
+        start = time.perf_counter()
         cls._setup_benchmark_data()
+        cls.report["corpus"]["setup_time"] = round(time.perf_counter() - start, 3)
 
     @classmethod
-    def _clean_existing_records(cls):
-        cls.env["dms.category"].search([]).sudo().unlink()
-        cls.env["dms.directory"].search([]).sudo().unlink()
-        cls.env["dms.storage"].search([]).sudo().unlink()
-        cls.env["dms.tag"].search([]).sudo().unlink()
+    def tearDownClass(cls):
+        path = os.environ.get("DMS_BENCHMARK_REPORT")
+        if path:
+            with open(path, "w") as report:
+                json.dump(cls.report, report, indent=2, sort_keys=True)
+            _logger.info("DMS benchmark report written to %s", path)
+        super().tearDownClass()
 
-    @classmethod
-    def _load(cls, module, *args):
-        path = str(os.path.join(module, *args))
-        convert_file(cls.env, "dms", args[-1], {}, "init", False, "test", path)
+    # ----------------------------------------------------------
+    # Corpus
+    # ----------------------------------------------------------
 
     @classmethod
     def _setup_benchmark_data(cls):
-        cls._load("dms", "tests", "data", "dms.category.csv")
-        cls._load("dms", "tests", "data", "dms.storage.csv")
-        cls._load("dms", "tests", "data", "dms.tag.csv")
-        cls._load("dms", "tests", "data", "dms.directory.csv")
-        cls._load("dms", "tests", "data", "dms.file.csv")
-
-    def _benchmark_table(self, data):
-        columns = len(data[0]) - 1
-        formt = "{:7}" + "| {:28}" * columns
-
-        result = formt.format(*data[0]) + "\n"
-        result += ("-" * 7) + (("+" + "-" * 29) * columns) + "\n"
-        for row in data[1:]:
-            result += formt.format(*row) + "\n"
-        return result
+        cls.storage = cls.env["dms.storage"].create(
+            {"name": "Benchmark Storage", "save_type": "database"}
+        )
+        cls.access_groups = cls._create_access_groups(cls.corpus["groups"])
+        cls.directories = cls._create_directories(
+            cls.corpus["directories"], cls.corpus["depth"]
+        )
+        cls._create_files(cls.corpus["files"])
+
+    @classmethod
+    def _create_access_groups(cls, count):
+        """Create a tree of access groups, the benchmark user being an explicit
+        member of every other group.
+        """
+        groups = cls.env["dms.access.group"].create(
+            [
+                {
+                    "name": f"Benchmark Group {index}",
+                    "perm_create": True,
+                    "perm_write": True,
+                    "perm_unlink": True,
+                    "explicit_user_ids": [(6, 0, [cls.user.id] if index % 2 else [])],
+                }
+                for index in range(count)
+            ]
+        )
+        for index, group in enumerate(groups[1:], start=1):
+            group.parent_group_id = groups[(index - 1) // 2]
+        return groups
+
+    @classmethod
+    def _create_directories(cls, count, depth):
+        """Create the directories level by level.
+
+        A hundredth of the directories are roots, the others are spread over
+        the next levels so that the lower levels form long chains.
+        """
+        directory_model = cls.env["dms.directory"]
+        roots_count = max(1, count // 100)
+        parents = directory_model.create(
+            [
+                {
+                    "name": f"Root {index}",
+                    "is_root_directory": True,
+                    "storage_id": cls.storage.id,
+                    "group_ids": [(6, 0, cls._access_group_ids(index))],
+                }
+                for index in range(roots_count)
+            ]
+        )
+        directories = parents
+        remaining = count - roots_count
+        for level in range(1, depth):
+            level_count = remaining // (depth - level)
+            remaining -= level_count
+            vals_list = []
+            for index in range(level_count):
+                parent = parents[index % len(parents)]
+                vals = {
+                    "name": f"Directory {level}-{index}",
+                    "is_root_directory": False,
+                    "parent_id": parent.id,
+                }
+                if not index % 10:
+                    vals["group_ids"] = [(6, 0, cls._access_group_ids(index))]
+                vals_list.append(vals)
+            if not vals_list:
+                continue
+            parents = directory_model.create(vals_list)
+            directories |= parents
+        return directories
+
+    @classmethod
+    def _access_group_ids(cls, index):
+        if not cls.access_groups:
+            return []
+        return cls.access_groups[index % len(cls.access_groups)].ids
+
+    @classmethod
+    def _create_files(cls, count):
+        file_model = cls.env["dms.file"]
+        directory_ids = cls.directories.ids
+        for offset in range(0, count, CREATE_BATCH_SIZE):
+            file_model.create(
+                [
+                    cls._file_vals(index, directory_ids[index % len(directory_ids)])
+                    for index in range(offset, min(offset + CREATE_BATCH_SIZE, count))
+                ]
+            )
+            cls.env.flush_all()
+            cls.env.invalidate_all()
 
-    def _benchmark_function(self, func, args_list):
-        tfunc = track_function(return_tracking=True)(func)
-        benchmark = []
-        for item in args_list:
-            self.registry.clear_all_caches()
-            args = item[0] if len(item) > 0 else []
-            kwargs = item[1] if len(item) > 1 else {}
-            tracking = tuple(tfunc(*args, **kwargs)[1][1:])
-            # pylint: disable=too-few-format-args
-            # pyupgrade: disable=UP030
-            benchmark.append("{}sq {:.3f}s {:.3f}s {:.3f}s".format(*tracking))
-        return benchmark
+    @classmethod
+    def _file_vals(cls, index, directory_id, prefix="file"):
+        return {
+            "name": f"{prefix}-{index}.txt",
+            "directory_id": directory_id,
+            "content": base64.b64encode(f"Benchmark {prefix} {index}".encode()),
+        }
 
     # ----------------------------------------------------------
-    # File
+    # Helpers
     # ----------------------------------------------------------
 
+    def _measure(self, name, func, *args, **kwargs):
+        """Run a function with cold caches and record its cost in the report.
+
+        :param str name: Key of the measure in the report.
+        :param func: The measured function.
+        :return: The result of the function.
+        """
+        self.env.flush_all()
+        self.env.invalidate_all()
+        self.registry.clear_all_caches()
+        cr = self.env.cr
+        query_count = cr.sql_log_count
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            self.env.flush_all()
+            wall_time = time.perf_counter() - start
+            __, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        measure = {
+            "queries": cr.sql_log_count - query_count,
+            "wall_time": round(wall_time, 4),
+            "peak_memory": peak_memory,
+        }
+        self.report["results"][name] = measure
+        _logger.info("%s: %s", name, json.dumps(measure))
+        return result
+
+    def _benchmark_models(self, model_name):
+        model = self.env[model_name].with_context(bin_size=True)
+        return {"super": model.sudo(), "user": model.with_user(self.user)}
+
     def _file_kanban_fields(self):
         return [
             "id",
@@ -107,285 +235,124 @@ class BenchmarkTestCase(common.TransactionCase):
             "permission_unlink",
         ]
 
-    def test_file_search_benchmark(self):
-        demo_uid = self.browse_ref("base.user_demo").id
-        admin_uid = self.browse_ref("base.user_admin").id
-        model = self.env["dms.file"].with_context(bin_size=True)
-        args = [
-            [[[]], {"limit": 1}],
-            [[[]], {"limit": 80}],
-            [[[]], {"limit": 500}],
-            [[[]]],
-        ]
-
-        benchmark_data_super = ["Super"] + self._benchmark_function(
-            model.sudo().search, args
-        )
-        benchmark_data_admin = ["Admin"] + self._benchmark_function(
-            model.with_user(admin_uid).search, args
-        )
-        benchmark_data_demo = ["Demo"] + self._benchmark_function(
-            model.with_user(demo_uid).search, args
-        )
-
-        info_message = "\n\nSearching files with bin_size = True | "
-        info_message += "Benchmark with Limit 1 / 80 / 500 / None (1500)\n\n"
-        info_message += self._benchmark_table(
-            [
+    def _user_directory(self):
+        """A directory of the corpus in which the benchmark user can create."""
+        return (
+            self.env["dms.directory"]
+            .with_user(self.user)
+            .search(
                 [
-                    "User",
-                    "Search Limit 1",
-                    "Search Limit 80",
-                    "Search Limit 500",
-                    "Search No Limit",
+                    ("id", "in", self.directories.ids),
+                    ("permission_create", "=", True),
                 ],
-                benchmark_data_super,
-                benchmark_data_admin,
-                benchmark_data_demo,
-            ]
+                limit=1,
+            )
         )
-        info_message += "\nLegend: Queries | Query Time | Server Time | Total Time\n"
-        _logger.info(info_message)
 
-    def test_file_search_read_benchmark(self):
-        demo_uid = self.browse_ref("base.user_demo").id
-        admin_uid = self.browse_ref("base.user_admin").id
-        model = self.env["dms.file"].with_context(bin_size=True)
-        args = [[[], {"limit": 1}], [[], {"limit": 80}], [[], {"limit": 500}], [[]]]
-
-        benchmark_data_super = ["Super"] + self._benchmark_function(
-            model.sudo().search_read, args
-        )
-        benchmark_data_admin = ["Admin"] + self._benchmark_function(
-            model.with_user(admin_uid).search_read, args
-        )
-        benchmark_data_demo = ["Demo"] + self._benchmark_function(
-            model.with_user(demo_uid).search_read, args
-        )
-
-        info_message = "\n\nSearching and reading all fields with bin_size = True | "
-        info_message += "Benchmark with Limit 1 / 80 / 500 / None (1500)\n\n"
-        info_message += self._benchmark_table(
-            [
-                [
-                    "User",
-                    "Search Limit 1",
-                    "Search Limit 80",
-                    "Search Limit 500",
-                    "Search No Limit",
-                ],
-                benchmark_data_super,
-                benchmark_data_admin,
-                benchmark_data_demo,
-            ]
-        )
-        info_message += "\nLegend: Queries | Query Time | Server Time | Total Time\n"
-        _logger.info(info_message)
-
-    def test_file_search_name_get_benchmark(self):
-        demo_uid = self.browse_ref("base.user_demo").id
-        admin_uid = self.browse_ref("base.user_admin").id
-        model = self.env["dms.file"].with_context(bin_size=True)
-
-        def test_function(model, limit):
-            return model.search([], limit=limit).mapped("display_name")
-
-        model_super = model.sudo()
-        model_admin = model.with_user(admin_uid)
-        model_demo = model.with_user(demo_uid)
-        args_super = [
-            [[model_super, 1]],
-            [[model_super, 800]],
-            [[model_super, 500]],
-            [[model_super, None]],
-        ]
-        args_admin = [
-            [[model_admin, 1]],
-            [[model_admin, 800]],
-            [[model_admin, 500]],
-            [[model_admin, None]],
-        ]
-        args_demo = [
-            [[model_demo, 1]],
-            [[model_demo, 800]],
-            [[model_demo, 500]],
-            [[model_demo, None]],
-        ]
-
-        benchmark_data_super = ["Super"] + self._benchmark_function(
-            test_function, args_super
-        )
-        benchmark_data_admin = ["Admin"] + self._benchmark_function(
-            test_function, args_admin
-        )
-        benchmark_data_demo = ["Demo"] + self._benchmark_function(
-            test_function, args_demo
-        )
-
-        info_message = (
-            "\n\nSearching and 'display_name' function with bin_size = True | "
-        )
-        info_message += "Benchmark with Limit 1 / 80 / 500 / None (1500)\n\n"
-        info_message += self._benchmark_table(
-            [
-                [
-                    "User",
-                    "Search Limit 1",
-                    "Search Limit 80",
-                    "Search Limit 500",
-                    "Search No Limit",
-                ],
-                benchmark_data_super,
-                benchmark_data_admin,
-                benchmark_data_demo,
-            ]
-        )
-        info_message += "\nLegend: Queries | Query Time | Server Time | Total Time\n"
-        _logger.info(info_message)
+    # ----------------------------------------------------------
+    # Read
+    # ----------------------------------------------------------
 
-    def test_file_kanban_backend_benchmark(self):
-        demo_uid = self.browse_ref("base.user_demo").id
-        admin_uid = self.browse_ref("base.user_admin").id
-        model = self.env["dms.file"].with_context(bin_size=True)
+    def test_search_panel_benchmark(self):
+        for user, model in self._benchmark_models("dms.file").items():
+            self._measure(
+                f"search_panel.full.{user}",
+                model.search_panel_select_range,
+                "directory_id",
+                enable_counters=True,
+            )
+            self._measure(
+                f"search_panel.lazy.{user}",
+                model.with_context(
+                    dms_panel_parent_ids=[False]
+                ).search_panel_select_range,
+                "directory_id",
+                enable_counters=True,
+            )
+            self._measure(
+                f"search_panel.tags.{user}",
+                model.search_panel_select_multi_range,
+                "tag_ids",
+            )
+
+    def test_kanban_search_read_benchmark(self):
         kanban_fields = self._file_kanban_fields()
-
-        def test_function(model, kanban_fields, limit=80):
-            model.search_panel_select_range("directory_id")
-            model.search_panel_select_multi_range("directory_id")
-            model.search_panel_select_multi_range("tag_ids")
-            model.search_read(fields=kanban_fields, limit=limit)
-
-        def function_args(args, kwargs):
-            return [[args, {"limit": arg}] for arg in kwargs]
-
-        args_super = function_args([model.sudo(), kanban_fields], [1, 80, 500, None])
-        args_admin = function_args(
-            [model.with_user(admin_uid), kanban_fields], [1, 80, 500, None]
-        )
-        args_demo = function_args(
-            [model.with_user(demo_uid), kanban_fields], [1, 80, 500, None]
-        )
-
-        benchmark_data_super = ["Super"] + self._benchmark_function(
-            test_function, args_super
-        )
-        benchmark_data_admin = ["Admin"] + self._benchmark_function(
-            test_function, args_admin
-        )
-        benchmark_data_demo = ["Demo"] + self._benchmark_function(
-            test_function, args_demo
-        )
-
-        info_message = "\n\nSimulate kanban view loading on the backend | "
-        info_message += "Benchmark with Limit 1 / 80 / 500 / None (1500)\n\n"
-        info_message += self._benchmark_table(
-            [
-                [
-                    "User",
-                    "Search Limit 1",
-                    "Search Limit 80",
-                    "Search Limit 500",
-                    "Search No Limit",
-                ],
-                benchmark_data_super,
-                benchmark_data_admin,
-                benchmark_data_demo,
-            ]
-        )
-        info_message += "\nLegend: Queries | Query Time | Server Time | Total Time || "
-        info_message += "500 Directories | 150 Tags | 50 Categories\n"
-        _logger.info(info_message)
+        for user, model in self._benchmark_models("dms.file").items():
+            for limit in (80, 500):
+                self._measure(
+                    f"kanban.search_read.{limit}.{user}",
+                    model.search_read,
+                    fields=kanban_fields,
+                    limit=limit,
+                )
+            self._measure(f"kanban.search_count.{user}", model.search_count, [])
+
+    def test_permission_benchmark(self):
+        permission_fields = [
+            "permission_read",
+            "permission_create",
+            "permission_write",
+            "permission_unlink",
+        ]
+        for model_name in ("dms.directory", "dms.file"):
+            model = self.env[model_name].with_user(self.user)
+            records = model.search([], limit=500)
+            self._measure(
+                f"permissions.compute.{model_name}",
+                records.read,
+                permission_fields,
+            )
+            self._measure(
+                f"permissions.search.{model_name}",
+                model.search_count,
+                [("permission_write", "=", True)],
+            )
 
     # ----------------------------------------------------------
-    # Directory
+    # Write
     # ----------------------------------------------------------
 
-    def test_directory_search_benchmark(self):
-        demo_uid = self.browse_ref("base.user_demo").id
-        admin_uid = self.browse_ref("base.user_admin").id
-        model = self.env["dms.directory"].with_context(bin_size=True)
-        args = [
-            [[[]], {"limit": 1}],
-            [[[]], {"limit": 80}],
-            [[[]], {"limit": 500}],
-            [[[]]],
-        ]
-
-        benchmark_data_super = ["Super"] + self._benchmark_function(
-            model.sudo().search, args
-        )
-        benchmark_data_admin = ["Admin"] + self._benchmark_function(
-            model.with_user(admin_uid).search, args
+    def test_upload_benchmark(self):
+        directory = self._user_directory()
+        files = self._measure(
+            "files.upload",
+            self.env["dms.file"].with_user(self.user).create,
+            [
+                self._file_vals(index, directory.id, prefix="upload")
+                for index in range(self.corpus["batch"])
+            ],
         )
-        benchmark_data_demo = ["Demo"] + self._benchmark_function(
-            model.with_user(demo_uid).search, args
+        self.assertEqual(len(files), self.corpus["batch"])
+
+    def test_move_benchmark(self):
+        target = self.env["dms.directory"].create(
+            {
+                "name": "Benchmark Target",
+                "is_root_directory": False,
+                "parent_id": self._user_directory().id,
+            }
         )
-
-        info_message = "\n\nSearching directories with bin_size = True | "
-        info_message += "Benchmark with Limit 1 / 80 / 500 / None (1500)\n\n"
-        info_message += self._benchmark_table(
-            [
+        files = (
+            self.env["dms.file"]
+            .with_user(self.user)
+            .search(
                 [
-                    "User",
-                    "Search Limit 1",
-                    "Search Limit 80",
-                    "Search Limit 500",
-                    "Search No Limit",
+                    ("directory_id", "!=", target.id),
+                    ("permission_write", "=", True),
                 ],
-                benchmark_data_super,
-                benchmark_data_admin,
-                benchmark_data_demo,
-            ]
+                limit=self.corpus["batch"],
+            )
         )
-        info_message += "\nLegend: Queries | Query Time | Server Time | Total Time\n"
-        _logger.info(info_message)
-
-    def test_directory_search_read_benchmark(self):
-        demo_uid = self.browse_ref("base.user_demo").id
-        admin_uid = self.browse_ref("base.user_admin").id
-        model = self.env["dms.directory"].with_context(bin_size=True)
-        args = [[[], {"limit": 1}], [[], {"limit": 80}], [[], {"limit": 500}], [[]]]
-
-        benchmark_data_super = ["Super"] + self._benchmark_function(
-            model.sudo().search_read, args
-        )
-        benchmark_data_admin = ["Admin"] + self._benchmark_function(
-            model.with_user(admin_uid).search_read, args
-        )
-        benchmark_data_demo = ["Demo"] + self._benchmark_function(
-            model.with_user(demo_uid).search_read, args
+        self._measure(
+            "files.move", files._move_to_directory, target.with_user(self.user)
         )
+        self.assertEqual(files.directory_id, target)
 
-        info_message = "\n\nSearching and reading all fields with bin_size = True | "
-        info_message += "Benchmark with Limit 1 / 80 / 500 / None (1500)\n\n"
-        info_message += self._benchmark_table(
-            [
-                [
-                    "User",
-                    "Search Limit 1",
-                    "Search Limit 80",
-                    "Search Limit 500",
-                    "Search No Limit",
-                ],
-                benchmark_data_super,
-                benchmark_data_admin,
-                benchmark_data_demo,
-            ]
+    def test_unlink_benchmark(self):
+        files = (
+            self.env["dms.file"]
+            .with_user(self.user)
+            .search([("permission_unlink", "=", True)], limit=self.corpus["batch"])
         )
-        info_message += "\nLegend: Queries | Query Time | Server Time | Total Time\n"
-        _logger.info(info_message)
-
-    # ----------------------------------------------------------
-    # Profiler
-    # ----------------------------------------------------------
-
-    @unittest.skip("Takes to long to be tested every time.")
-    def test_file_search_read_profile_admin(self):
-        @track_function()
-        @profile(minimum_queries=35)
-        def profile_function(model):
-            model.search_read([])
-
-        admin_uid = self.browse_ref("base.user_admin").id
-        model = self.env["dms.file"].with_user(admin_uid)
-        profile_function(model.with_context(bin_size=True))
+        self._measure("files.unlink", files.unlink)
+        self.assertFalse(files.exists())
@@ -4,10 +4,12 @@
 # Copyright 2024 Subteno - Timothée Vannier (https://www.subteno.com).
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import base64
 import os
+from unittest.mock import patch
 
 from odoo import Command
-from odoo.exceptions import AccessError, UserError
+from odoo.exceptions import AccessError, UserError, ValidationError
 from odoo.tests import new_test_user
 from odoo.tests.common import users
 from odoo.tools import mute_logger
@@ -96,6 +98,13 @@ class DirectoryTestCaseBase(StorageDatabaseBaseCase):
             msg="The path name of the subdirectory should have changed",
         )
 
+    def test_unarchive_directory_same_name(self):
+        directory = self.create_directory(directory=self.directory)
+        directory.action_archive()
+        self.create_directory(directory=self.directory).name = directory.name
+        with self.assertRaisesRegex(ValidationError, "same name"):
+            directory.action_unarchive()
+
     @users("dms-manager", "dms-user")
     def test_move_directory(self):
         with self.assertRaises(UserError, msg="The root directory should not be moved"):
@@ -240,6 +249,70 @@ class DirectoryTestCaseBase(StorageDatabaseBaseCase):
     def test_size(self):
         self.assertTrue(self.directory.size, msg="The directory should have a size")
 
+    @users("dms-manager", "dms-user")
+    @mute_logger("odoo.models.unlink")
+    def test_total_rollup(self):
+        root_directory = self.create_directory(storage=self.storage)
+        sub_directory = self.create_directory(directory=root_directory)
+        sub_file = self.create_file(
+            directory=sub_directory, content=base64.b64encode(b"\x00" * 10)
+        )
+        self.create_file(directory=root_directory, content=base64.b64encode(b"1234"))
+        self.assertEqual(root_directory.count_total_directories, 1)
+        self.assertEqual(root_directory.count_total_files, 2)
+        self.assertEqual(root_directory.size, 14)
+        sub_file.content = base64.b64encode(b"\x00" * 20)
+        self.assertEqual(root_directory.size, 24)
+        sub_file.action_archive()
+        self.assertEqual(root_directory.count_total_files, 1)
+        self.assertEqual(root_directory.size, 4)
+        sub_file.action_unarchive()
+        other_directory = self.create_directory(storage=self.storage)
+        sub_directory.parent_id = other_directory
+        self.assertEqual(root_directory.count_total_directories, 0)
+        self.assertEqual(root_directory.count_total_files, 1)
+        self.assertEqual(other_directory.count_total_directories, 1)
+        self.assertEqual(other_directory.size, 20)
+        sub_directory.unlink()
+        self.assertEqual(other_directory.count_total_directories, 0)
+        self.assertEqual(other_directory.count_total_files, 0)
+        self.assertEqual(other_directory.size, 0)
+
+    @users("dms-manager")
+    def test_unlink_subtree(self):
+        root_directory = self.create_directory(storage=self.storage)
+        directory = self.create_directory(directory=root_directory)
+        directories = directory
+        parent = directory
+        for __ in range(5):
+            parent = self.create_directory(directory=parent)
+            directories |= parent
+        files = self.create_file(directory=directory) | self.create_file(
+            directory=parent
+        )
+        files[0].action_archive()
+        self.assertEqual(directory._get_subtree()[0], parent)
+        self.assertEqual(set(directory._get_subtree().ids), set(directories.ids))
+        self.assertEqual(root_directory.count_total_directories, 6)
+        directory.unlink()
+        self.assertFalse(directories.exists())
+        self.assertFalse(files.exists())
+        self.assertEqual(root_directory.count_total_directories, 0)
+        self.assertEqual(root_directory.count_total_files, 0)
+
+    @users("dms-manager")
+    def test_unlink_background(self):
+        directory = self.create_directory(directory=self.directory)
+        sub_directory = self.create_directory(directory=directory)
+        dms_file = self.create_file(directory=sub_directory)
+        directory.action_unlink_background()
+        self.assertTrue(directory.deletion_pending)
+        self.assertTrue(dms_file.exists())
+        cron_model = type(self.env["ir.cron"])
+        with patch.object(cron_model, "_commit_progress", return_value=60.0):
+            self.directory_model._cron_unlink_pending_directories(batch_size=1)
+        self.assertFalse((directory | sub_directory | dms_file).exists())
+
     @users("dms-manager", "dms-user")
     def test_name_get(self):
         directory = self.subdirectory.with_context(dms_directory_show_path=True)
@@ -268,6 +341,90 @@ class DirectoryTestCaseBase(StorageDatabaseBaseCase):
             msg="The tag_ids field should be a multi range field",
         )
 
+    @users("dms-manager", "dms-user")
+    def test_own_root_directories(self):
+        root_ids = self.directory_model._get_own_root_directories()
+        self.assertIn(self.directory.id, root_ids)
+        self.assertNotIn(self.subdirectory.id, root_ids)
+
+    def test_complete_groups_subtree(self):
+        root_directory = self.create_directory(storage=self.storage)
+        sub_directory = self.create_directory(directory=root_directory)
+        leaf_directory = self.create_directory(directory=sub_directory)
+        new_group = self.access_group_model.create({"name": "Subtree group"})
+        root_directory.group_ids = [(4, new_group.id)]
+        self.assertIn(new_group, sub_directory.complete_group_ids)
+        self.assertIn(new_group, leaf_directory.complete_group_ids)
+        sub_directory.inherit_group_ids = False
+        self.assertNotIn(new_group, sub_directory.complete_group_ids)
+        self.assertNotIn(new_group, leaf_directory.complete_group_ids)
+        other_group = self.access_group_model.create(
+            {"name": "Other subtree group", "directory_ids": [(4, sub_directory.id)]}
+        )
+        self.assertIn(other_group, leaf_directory.complete_group_ids)
+        self.assertIn(leaf_directory, other_group.complete_directory_ids)
+
+    def test_access_token_subtree(self):
+        access_token = self.directory._portal_ensure_token()
+        self.assertTrue(self.directory.check_access_token(access_token))
+        self.assertTrue(self.subdirectory.check_access_token(access_token))
+        self.assertTrue(self.file.check_access_token(access_token))
+        self.assertFalse(self.file.check_access_token("abc-def"))
+        other_directory = self.create_directory(storage=self.storage)
+        self.assertFalse(other_directory.check_access_token(access_token))
+        self.subdirectory.write(
+            {
+                "is_root_directory": True,
+                "storage_id": self.storage.id,
+                "parent_id": False,
+            }
+        )
+        self.assertFalse(self.subdirectory.check_access_token(access_token))
+        self.assertFalse(self.file.check_access_token(access_token))
+
+    @users("dms-manager", "dms-user")
+    def test_search_panel_active_directory(self):
+        result = self.file_model.with_context(
+            active_model="dms.directory", active_id=self.directory.id
+        ).search_panel_select_range("directory_id")
+        self.assertEqual(
+            {value["id"] for value in result["values"]},
+            {self.directory.id, self.subdirectory.id},
+        )
+
+    def test_search_panel_children(self):
+        root_directory = self.create_directory(storage=self.storage)
+        sub_directory = self.create_directory(directory=root_directory)
+        leaf_directory = self.create_directory(directory=sub_directory)
+        last_directory = self.create_directory(directory=leaf_directory)
+        self.create_file(directory=leaf_directory)
+        self.create_file(directory=last_directory)
+        domain = [("id", "child_of", root_directory.id)]
+        result = self.directory_model.search_panel_children(
+            [False], domain=domain, file_domain=[]
+        )
+        values = {value["id"]: value for value in result["values"]}
+        # The roots are returned with their children only
+        self.assertEqual(set(values), {root_directory.id, sub_directory.id})
+        self.assertEqual(set(result["loaded"]), {False, root_directory.id})
+        self.assertFalse(values[root_directory.id]["parent_id"])
+        self.assertEqual(values[sub_directory.id]["parent_id"], root_directory.id)
+        self.assertEqual(values[root_directory.id]["child_count"], 1)
+        self.assertEqual(values[root_directory.id]["__count"], 2)
+        result = self.directory_model.search_panel_children(
+            [sub_directory.id], domain=domain
+        )
+        values = {value["id"]: value for value in result["values"]}
+        self.assertEqual(set(values), {leaf_directory.id, last_directory.id})
+        self.assertEqual(values[leaf_directory.id]["child_count"], 1)
+        self.assertEqual(values[leaf_directory.id]["__count"], 0)
+        # The ancestors of the active directory are expanded
+        result = self.file_model.with_context(
+            dms_panel_parent_ids=[False], dms_panel_active_id=last_directory.id
+        ).search_panel_select_range("directory_id", enable_counters=True)
+        self.assertIn(leaf_directory.id, result["loaded"])
+        self.assertIn(last_directory.id, [value["id"] for value in result["values"]])
+
     def test_directory_unlink_custom(self):
         user = new_test_user(
             self.env, login="test-dms-customer-user", groups="dms.group_dms_user"
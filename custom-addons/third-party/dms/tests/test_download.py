@@ -0,0 +1,80 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import base64
+import io
+
+from PIL import Image
+
+import odoo.tests
+
+from .common import StorageDatabaseBaseCase
+
+
+@odoo.tests.tagged("post_install", "-at_install")
+class TestDmsDownload(odoo.tests.HttpCase, StorageDatabaseBaseCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.file_storage = cls.create_storage(save_type="file")
+        cls.filestore_file = cls.create_file(
+            directory=cls.create_directory(storage=cls.file_storage)
+        )
+
+    def _download(self, dms_file, headers=None):
+        self.authenticate("dms-manager", "dms-manager")
+        return self.url_open(
+            f"/my/dms/file/{dms_file.id}/download", headers=headers, timeout=20
+        )
+
+    def test_download(self):
+        for dms_file in self.file | self.filestore_file:
+            response = self._download(dms_file)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b"\xff data")
+            self.assertEqual(response.headers["Content-Length"], "6")
+            self.assertIn(dms_file.name, response.headers["Content-Disposition"])
+            self.assertTrue(response.headers["ETag"])
+
+    def test_download_conditional(self):
+        for dms_file in self.file | self.filestore_file:
+            etag = self._download(dms_file).headers["ETag"]
+            response = self._download(dms_file, headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+
+    def test_download_range(self):
+        for dms_file in self.file | self.filestore_file:
+            response = self._download(dms_file, headers={"Range": "bytes=2-4"})
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response.content, b"dat")
+
+    def test_backend_content(self):
+        self.authenticate("dms-manager", "dms-manager")
+        for dms_file in self.file | self.filestore_file:
+            response = self.url_open(
+                f"/web/content/dms.file/{dms_file.id}/content", timeout=20
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b"\xff data")
+
+    def _image_base64(self, color):
+        output = io.BytesIO()
+        Image.new("RGB", (4, 4), color).save(output, format="PNG")
+        return base64.b64encode(output.getvalue())
+
+    def test_thumbnail_cache(self):
+        image_file = self.create_file(
+            directory=self.directory, content=self._image_base64("red")
+        )
+        image_file.name = "image.png"
+        self.assertTrue(image_file.has_thumbnail)
+        icon_url = image_file.icon_url
+        self.assertIn(f"unique={image_file.thumbnail_checksum}", icon_url)
+        self.authenticate("dms-manager", "dms-manager")
+        response = self.url_open(icon_url, timeout=20)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        image_file.content = self._image_base64("blue")
+        self.assertNotEqual(image_file.icon_url, icon_url)
+        self.assertFalse(self.file.has_thumbnail)
+        self.assertTrue(self.file.icon_url.startswith("/dms/static/icons/"))
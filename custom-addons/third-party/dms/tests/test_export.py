@@ -0,0 +1,70 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import io
+import zipfile
+from urllib.parse import urlencode
+
+import odoo.tests
+from odoo.tests import new_test_user
+from odoo.tools import mute_logger
+
+from ..controllers.export import DmsExportController
+from .common import StorageDatabaseBaseCase
+
+
+@odoo.tests.tagged("post_install", "-at_install")
+class TestDmsExport(odoo.tests.HttpCase, StorageDatabaseBaseCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.subdirectory = cls.create_directory(directory=cls.directory)
+        cls.empty_directory = cls.create_directory(directory=cls.directory)
+        cls.subfile = cls.create_file(directory=cls.subdirectory)
+
+    def _export(self, login="dms-manager", **params):
+        self.authenticate(login, login)
+        return self.url_open(f"/dms/export/zip?{urlencode(params)}", timeout=20)
+
+    def _export_archive(self, **params):
+        response = self._export(**params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Type"], "application/zip")
+        return zipfile.ZipFile(io.BytesIO(response.content))
+
+    def test_export_directory(self):
+        archive = self._export_archive(directory_ids=self.directory.id)
+        root = self.directory.name
+        names = archive.namelist()
+        self.assertIn(f"{root}/{self.file.name}", names)
+        subfile_name = f"{root}/{self.subdirectory.name}/{self.subfile.name}"
+        self.assertIn(subfile_name, names)
+        self.assertIn(
+            f"{root}/{self.empty_directory.name}/",
+            names,
+            msg="Empty directories are kept in the archive",
+        )
+        self.assertEqual(archive.read(subfile_name), b"\xff data")
+
+    def test_export_files(self):
+        archive = self._export_archive(file_ids=f"{self.file.id},{self.subfile.id}")
+        self.assertEqual(
+            sorted(archive.namelist()), sorted([self.file.name, self.subfile.name])
+        )
+
+    def test_export_stream_without_request(self):
+        """The archive is generated after the request has been released."""
+        entries = [(self.file.name, self.file.write_date.timetuple()[:6], self.file.id)]
+        stream = DmsExportController()._stream_zip(
+            self.env.registry, self.env.uid, entries, []
+        )
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(stream)))
+        self.assertEqual(archive.read(self.file.name), b"\xff data")
+
+    @mute_logger("odoo.addons.base.models.ir_rule", "odoo.http")
+    def test_export_without_access(self):
+        new_test_user(self.env, login="dms-export-user", groups="dms.group_dms_user")
+        response = self._export(
+            login="dms-export-user", directory_ids=self.directory.id
+        )
+        self.assertEqual(response.status_code, 403)
@@ -4,8 +4,9 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 import base64
+import hashlib
 
-from odoo.exceptions import UserError
+from odoo.exceptions import UserError, ValidationError
 from odoo.tests import new_test_user
 from odoo.tests.common import users
 from odoo.tools import mute_logger
@@ -105,6 +106,36 @@ class FileFilestoreTestCase(StorageFileBaseCase):
             msg="User A should see sub_directory_x",
         )
 
+    def test_access_group_users_membership(self):
+        res_group = self.env["res.groups"].create({"name": "DMS membership"})
+        child_group = self.access_group_model.create(
+            {"name": "Child of Group A", "parent_group_id": self.group_a.id}
+        )
+        self.group_a.group_ids = [(4, res_group.id)]
+        user_b = new_test_user(self.env, login="user-b", groups="dms.group_dms_user")
+        self.assertNotIn(user_b, self.group_a.users)
+        user_b.group_ids = [(4, res_group.id)]
+        self.assertIn(user_b, self.group_a.users)
+        self.assertIn(user_b, child_group.users)
+        self.assertEqual(self.group_a.count_users, len(self.group_a.users))
+        res_group.user_ids = [(3, user_b.id)]
+        self.assertNotIn(user_b, self.group_a.users)
+        self.assertNotIn(user_b, child_group.users)
+        self.assertIn(self.user_a, self.group_a.users)
+
+    @users("user-a")
+    def test_permission_matrix(self):
+        files = (self.file2 + self.inaccessible_file).with_user(self.env.user)
+        matrix = files._get_permission_matrix()
+        self.assertEqual(
+            matrix[self.file2.id],
+            {"create": True, "read": True, "write": False, "unlink": False},
+        )
+        self.assertFalse(any(matrix[self.inaccessible_file.id].values()))
+        file2 = self.file2.with_user(self.env.user)
+        self.assertTrue(file2.permission_read)
+        self.assertFalse(file2.permission_write)
+
     @users("dms-manager", "dms-user")
     @mute_logger("odoo.models.unlink")
     def test_content_file(self):
@@ -191,3 +222,98 @@ class FileFilestoreTestCase(StorageFileBaseCase):
         self.assertEqual(
             file3.directory_id, self.directory, msg="File3 has a new directory"
         )
+
+    def test_unarchive_file_same_name(self):
+        file = self.create_file(directory=self.sub_directory_x)
+        file.action_archive()
+        self.create_file(directory=self.sub_directory_x).name = file.name
+        with self.assertRaisesRegex(ValidationError, "same name"):
+            file.action_unarchive()
+
+    def test_move_to_directory(self):
+        files = self.create_file(directory=self.sub_directory_x) + self.create_file(
+            directory=self.sub_directory_x
+        )
+        target = self.create_directory(directory=self.directory_group_a)
+        clash = self.create_file(directory=target)
+        files[0].name = clash.name
+        with self.assertRaisesRegex(ValidationError, clash.name):
+            files._move_to_directory(target)
+        self.assertEqual(files.directory_id, self.sub_directory_x)
+        files[0].name = "moved.txt"
+        messages = target.message_ids
+        files._move_to_directory(target)
+        self.assertEqual(files.directory_id, target)
+        self.assertEqual(target.file_ids, clash + files)
+        self.assertEqual(len(target.message_ids - messages), 1)
+        self.assertIn(target.display_name, files[0].message_ids[0].body)
+
+    def test_move_to_directory_create_access(self):
+        target = self.create_directory(storage=self.storage)
+        target.group_ids = self.access_group_model.create(
+            {
+                "name": "Create only",
+                "perm_create": True,
+                "explicit_user_ids": [(6, 0, [self.user_a.id])],
+            }
+        )
+        source = self.create_directory(storage=self.storage)
+        source.group_ids = self.access_group_model.create(
+            {
+                "name": "Full access",
+                "perm_create": True,
+                "perm_write": True,
+                "perm_unlink": True,
+                "explicit_user_ids": [(6, 0, [self.user_a.id])],
+            }
+        )
+        files = self.create_file(directory=source) + self.create_file(directory=source)
+        target_as_user = target.with_user(self.user_a)
+        self.assertTrue(target_as_user.permission_create)
+        self.assertFalse(target_as_user.permission_write)
+        files.with_user(self.user_a)._move_to_directory(target_as_user)
+        self.assertEqual(files.directory_id, target)
+        self.assertEqual(target.message_ids[0].author_id, self.user_a.partner_id)
+
+    def test_verify_contents(self):
+        dms_file = self.create_file(directory=self.sub_directory_x)
+        missing_file = self.create_file(directory=self.sub_directory_x)
+        domain = [("id", "in", (dms_file | missing_file).ids)]
+        self.assertEqual(self.file_model._verify_contents(domain=domain), [])
+        dms_file.sudo().write({"checksum": "0" * 40})
+        missing = (dms_file | missing_file)._get_content_attachments()[missing_file.id]
+        # Point the attachment to a lost file, the filestore is left untouched
+        self.env.cr.execute(
+            "UPDATE ir_attachment SET store_fname = %s WHERE id = %s",
+            (f"{missing.store_fname}.missing", missing.id),
+        )
+        missing.invalidate_recordset()
+        mismatches = {
+            item["id"]: item["computed"]
+            for item in self.file_model._verify_contents(domain=domain, batch_size=1)
+        }
+        self.assertEqual(set(mismatches), {dms_file.id, missing_file.id})
+        self.assertEqual(
+            mismatches[dms_file.id], hashlib.sha1(b"\xff data").hexdigest()
+        )
+        self.assertIsNone(mismatches[missing_file.id])
+
+    def test_gc_orphan_attachments(self):
+        attachment_model = self.env["ir.attachment"].sudo()
+        orphan = attachment_model.create(
+            {
+                "name": "orphan",
+                "res_model": "dms.file",
+                "res_field": "content_file",
+                "res_id": self.file2.id,
+                "raw": b"orphan",
+            }
+        )
+        self.env.cr.execute(
+            "UPDATE ir_attachment SET res_id = %s WHERE id = %s",
+            (self.file2.id + 1000000, orphan.id),
+        )
+        attachment = self.file2._get_content_attachments()[self.file2.id]
+        attachment_model._gc_dms_orphan_attachments_batch()
+        self.assertFalse(orphan.exists())
+        self.assertTrue(attachment.exists())
@@ -3,7 +3,9 @@
 # Copyright 2021-2022 Tecnativa - Víctor Martínez
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-from odoo.exceptions import UserError
+import json
+
+from odoo.exceptions import UserError, ValidationError
 from odoo.tests.common import users
 from odoo.tools import mute_logger
 
@@ -48,6 +50,24 @@ class FileDatabaseTestCase(StorageDatabaseBaseCase):
             self.file.content, copy_file.content, "Content should be the same"
         )
 
+    @users("dms-manager", "dms-user")
+    def test_copy_file_name(self):
+        file = self.create_file(directory=self.directory)
+        file.name = f"copy-{self.env.user.login}.txt"
+        copy_file = file.copy()
+        self.assertEqual(copy_file.name, f"copy-{self.env.user.login}(1).txt")
+        self.assertEqual(file.copy().name, f"copy-{self.env.user.login}(2).txt")
+        self.assertEqual(copy_file.copy().name, f"copy-{self.env.user.login}(3).txt")
+
+    @users("dms-manager", "dms-user")
+    def test_duplicated_name(self):
+        file = self.create_file(directory=self.directory)
+        other_file = self.create_file(directory=self.directory)
+        with self.assertRaises(ValidationError):
+            other_file.name = file.name
+        with self.assertRaises(ValidationError):
+            other_file.name = "../test.txt"
+
     @users("dms-manager", "dms-user")
     def test_rename_file(self):
         file = self.create_file(directory=self.directory)
@@ -96,6 +116,25 @@ class FileDatabaseTestCase(StorageDatabaseBaseCase):
     def test_compute_path_json(self):
         self.assertTrue(self.file.path_json, "Path json should be computed")
 
+    @users("dms-manager", "dms-user")
+    def test_compute_path_rename_directory(self):
+        directory = self.create_directory(directory=self.directory)
+        file = self.create_file(directory=directory)
+        self.assertEqual(
+            file.path_names,
+            f"{self.directory.name}/{directory.name}/{file.name}",
+        )
+        directory.name = f"renamed-{self.env.user.login}"
+        file.invalidate_recordset(["path_names", "path_json"])
+        self.assertEqual(
+            file.path_names,
+            f"{self.directory.name}/{directory.name}/{file.name}",
+        )
+        self.assertEqual(
+            [item["id"] for item in json.loads(file.path_json)],
+            [self.directory.id, directory.id, file.id],
+        )
+
     @users("dms-manager", "dms-user")
     def test_compute_mimetype(self):
         self.assertTrue(self.file.mimetype, "Mimetype should be computed")
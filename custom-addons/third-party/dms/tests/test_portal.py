@@ -1,11 +1,14 @@
 # Copyright 2021-2025 Tecnativa - Víctor Martínez
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl)
 
+from unittest.mock import patch
+
 import odoo.tests
 from odoo.exceptions import AccessError
 from odoo.tests.common import users
 from odoo.tools import mute_logger
 
+from ..controllers.portal import CustomerPortal
 from .common import StorageAttachmentBaseCase
 
 
@@ -88,3 +91,31 @@ class TestDmsPortal(odoo.tests.HttpCase, StorageAttachmentBaseCase):
             file.check_access("write")
         with self.assertRaises(AccessError, msg="Portal user should not have access"):
             file.check_access("unlink")
+
+    def test_directory_pagination(self):
+        storage = self.create_storage(save_type="database")
+        directory = self.create_directory(storage=storage)
+        subdirectory = self.create_directory(directory=directory)
+        files = sorted(
+            (self.create_file(directory=directory) for __ in range(3)),
+            key=lambda dms_file: dms_file.name,
+        )
+        self.authenticate("dms-manager", "dms-manager")
+        url = f"/my/dms/directory/{directory.id}"
+        with patch.object(CustomerPortal, "_items_per_page", 2):
+            page = self.url_open(url, timeout=20).text
+            self.assertIn(subdirectory.name, page)
+            self.assertIn(files[0].name, page)
+            self.assertNotIn(files[1].name, page)
+            self.assertIn(f"after=f{files[0].id}", page)
+            page = self.url_open(f"{url}?after=f{files[0].id}", timeout=20).text
+            self.assertNotIn(subdirectory.name, page)
+            self.assertIn(files[1].name, page)
+            self.assertIn(files[2].name, page)
+            self.assertNotIn("after=", page)
+            self.assertIn(f"before=f{files[1].id}", page)
+            page = self.url_open(f"{url}?before=f{files[1].id}", timeout=20).text
+            self.assertIn(subdirectory.name, page)
+            self.assertIn(files[0].name, page)
+            self.assertNotIn(files[1].name, page)
+            self.assertNotIn("before=", page)
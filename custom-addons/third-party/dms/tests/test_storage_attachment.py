@@ -3,6 +3,8 @@
 # Copyright 2024 Subteno - Timothée Vannier (https://www.subteno.com).
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+from unittest.mock import patch
+
 from odoo.tests.common import users
 from odoo.tools import mute_logger
 
@@ -35,6 +37,51 @@ class StorageAttachmentTestCase(StorageAttachmentBaseCase):
         self.assertFalse(file_01.exists(), "File should not exist")
         self.assertFalse(directory.exists(), "Directory should not exist")
 
+    def test_storage_attachment_batch(self):
+        partners = self.partner | self.other_partner
+        attachments = self.attachment_model.create(
+            [
+                {
+                    "name": f"batch_{partner.id}_{index}.txt",
+                    "res_model": partner._name,
+                    "res_id": partner.id,
+                    "datas": self.content_base64(),
+                }
+                for partner in partners
+                for index in range(3)
+            ]
+        )
+        for partner in partners:
+            directory = self._get_partner_directory(partner)
+            self.assertEqual(len(directory), 1)
+            self.assertEqual(
+                directory.file_ids.attachment_id,
+                attachments.filtered(
+                    lambda att, partner=partner: att.res_id == partner.id
+                ),
+            )
+        files = self.file_model.search([("attachment_id", "in", attachments.ids)])
+        self.assertEqual(len(files), 6)
+        attachments._dms_operations()
+        self.assertEqual(
+            self.file_model.search_count([("attachment_id", "in", attachments.ids)]), 6
+        )
+
+    @mute_logger("odoo.models.unlink")
+    def test_unlink_cascade_linked_models(self):
+        self._create_attachment("demo.txt")
+        directory = self._get_partner_directory()
+        self.assertIn(self.partner._name, self.directory_model._get_linked_res_models())
+        category = self.env["res.partner.category"].create({"name": "DMS"})
+        self.assertNotIn(category._name, self.directory_model._get_linked_res_models())
+        with patch.object(
+            type(category), "_dms_unlink_linked_records", autospec=True
+        ) as unlink_linked:
+            category.unlink()
+        unlink_linked.assert_not_called()
+        self.partner.unlink()
+        self.assertFalse(directory.exists(), "Directory should not exist")
+
     @users("dms-manager")
     def test_storage_attachment_record_db_unlink(self):
         self._create_attachment("demo.txt")
@@ -166,3 +213,22 @@ class StorageAttachmentTestCase(StorageAttachmentBaseCase):
         attachment = self._create_attachment("Test file")
         self.assertEqual(attachment.name, "Test file", "Name should be Test file")
         self.assertTrue(self._get_partner_directory(), "Directory should exist")
+
+    @users("dms-user")
+    def test_inherited_access_domain_cache(self):
+        self._create_attachment("demo.txt")
+        directory_model = self.env["dms.directory"]
+        domain = directory_model._get_domain_by_inheritance("read")
+        self.assertEqual(domain, directory_model._get_domain_by_inheritance("read"))
+        res_ids = dict(directory_model._get_inherited_access_res_ids())
+        self.assertIn(self.partner.id, res_ids["res.partner"])
+        self.assertNotIn(self.other_partner.id, res_ids["res.partner"])
+        # A directory linked to a new record invalidates the cache of the
+        # storage only
+        version = self.storage.inherited_access_version
+        self._create_attachment("demo.txt", self.other_partner)
+        self.assertEqual(self.storage.inherited_access_version, version + 1)
+        res_ids = dict(directory_model._get_inherited_access_res_ids())
+        self.assertIn(self.other_partner.id, res_ids["res.partner"])
+        directory = self._get_partner_directory(self.other_partner)
+        self.assertTrue(directory.with_user(self.env.user).permission_read)
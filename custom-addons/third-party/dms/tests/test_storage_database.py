@@ -3,6 +3,11 @@
 # Copyright 2022 Víctor Martínez
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import shutil
+import tempfile
+from datetime import timedelta
+
+from odoo import fields
 from odoo.tests.common import users
 from odoo.tools import mute_logger
 
@@ -136,3 +141,128 @@ class StorageDatabaseTestCase(StorageDatabaseBaseCase):
         self.assertEqual(
             file_03.save_type, "database", "File savetype should be database"
         )
+
+    @users("dms-manager")
+    @mute_logger("odoo.addons.dms.models.storage", "odoo.models.unlink")
+    def test_file_migrate_batches(self):
+        storage = self.create_storage(save_type="database")
+        directory = self.create_directory(storage=storage)
+        files = self.file_model.browse()
+        for __ in range(3):
+            files |= self.create_file(directory=directory)
+        corrupted = files[1]
+        corrupted.sudo().write({"checksum": "0" * 40})
+        storage = storage.with_user(self.env.user)
+        storage.write({"save_type": "file", "migration_batch_size": 1})
+        storage.action_storage_migrate()
+        self.assertEqual(storage.migration_state, "running")
+        self.assertEqual(storage.migration_total, 3)
+        self.assertEqual(set(files.mapped("save_type")), {"database"})
+        self.assertEqual(storage._migrate_files_batch(), (1, 2))
+        self.assertEqual(storage.migration_checkpoint, files[0].id)
+        self.assertEqual(files[0].save_type, "file")
+        storage.action_storage_migrate_pause()
+        self.assertEqual(storage.migration_state, "paused")
+        storage.action_storage_migrate_resume()
+        self.assertEqual(storage.migration_state, "running")
+        self.assertEqual(storage._migrate_files_batch(), (1, 1))
+        self.assertEqual(storage._migrate_files_batch(), (1, 0))
+        self.assertEqual(storage.migration_state, "done")
+        self.assertEqual(storage.migration_done, 2)
+        self.assertEqual(storage.migration_errors, 1)
+        self.assertEqual(corrupted.save_type, "database")
+        self.assertEqual((files - corrupted).mapped("save_type"), ["file", "file"])
+        self.assertEqual(files[0].content, self.content_base64())
+
+    @users("dms-manager")
+    def test_file_content_deduplication(self):
+        blob_model = self.env["dms.blob"].sudo()
+        file_01 = self.create_file(directory=self.directory)
+        file_02 = self.create_file(directory=self.directory)
+        self.assertTrue(file_01.blob_id)
+        self.assertEqual(file_01.blob_id, file_02.blob_id)
+        self.assertEqual(file_01.blob_id.sudo().ref_count, 2)
+        self.assertEqual(file_02.content, self.content_base64())
+        # Contents saved before the deduplication are moved to the blobs
+        legacy = self.create_file(directory=self.directory)
+        legacy.sudo().write({"blob_id": False, "content_binary": b"\xff data"})
+        self.assertEqual(legacy.content, self.content_base64())
+        processed, reclaimed = blob_model._deduplicate_contents()
+        self.assertGreaterEqual(processed, 1)
+        self.assertGreaterEqual(reclaimed, len(b"\xff data"))
+        self.assertEqual(legacy.blob_id, file_01.blob_id)
+        self.assertFalse(legacy.sudo().content_binary)
+        self.assertEqual(legacy.content, self.content_base64())
+        # Blobs are only removed once they are not referenced anymore
+        blob = file_01.blob_id.sudo()
+        file_01.unlink()
+        blob_model._gc_unreferenced_blobs()
+        self.assertTrue(blob.exists())
+        (file_02 | legacy | self.file).unlink()
+        blob_model._gc_unreferenced_blobs()
+        self.assertFalse(blob.exists())
+
+    def test_file_cold_storage(self):
+        cold_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cold_path, True)
+        storage = self.create_storage(save_type="database")
+        storage.write(
+            {"cold_backend": "local", "cold_path": cold_path, "cold_after_days": 30}
+        )
+        directory = self.create_directory(storage=storage)
+        idle_file = self.create_file(directory=directory)
+        recent_file = self.create_file(directory=directory)
+        old_date = fields.Datetime.now() - timedelta(days=60)
+        self.env.cr.execute(
+            "UPDATE dms_file SET last_access_date = %s WHERE id = %s",
+            (old_date, idle_file.id),
+        )
+        recent_file._touch_last_access()
+        idle_file.invalidate_recordset()
+        self.assertEqual(storage._tier_files_batch(), (1, 0))
+        self.assertEqual(idle_file.cold_storage_id, storage)
+        self.assertFalse(idle_file.blob_id)
+        self.assertFalse(recent_file.cold_storage_id)
+        # Cold contents are read back transparently, only the downloads are
+        # accesses
+        self.assertEqual(idle_file.content, self.content_base64())
+        with idle_file._open_content() as source:
+            self.assertEqual(source.read(), b"\xff data")
+        idle_file.invalidate_recordset(["last_access_date"])
+        self.assertEqual(idle_file.last_access_date, old_date)
+        self.env["ir.binary"]._record_to_stream(idle_file, "content")
+        idle_file.invalidate_recordset(["last_access_date"])
+        self.assertGreater(idle_file.last_access_date, old_date)
+        self.assertEqual(storage._tier_files_batch(), (1, 0))
+        self.assertFalse(idle_file.cold_storage_id)
+        self.assertTrue(idle_file.blob_id)
+        self.assertEqual(idle_file.content, self.content_base64())
+
+    def test_file_cold_storage_shared_content(self):
+        cold_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cold_path, True)
+        storage = self.create_storage(save_type="database")
+        storage.write({"cold_backend": "local", "cold_path": cold_path})
+        directory = self.create_directory(storage=storage)
+        first_file = self.create_file(directory=directory)
+        second_file = self.create_file(directory=directory)
+        store = storage._get_cold_store()
+        cold_model = self.env["dms.cold.content"]
+        first_file._move_to_cold()
+        checksum = first_file.checksum
+        # One duplicate is restored while the other one is tiered
+        first_file._restore_from_cold()
+        second_file._move_to_cold()
+        cold_model._gc_cold_contents_batch()
+        second_file.invalidate_recordset()
+        self.assertEqual(second_file.content, self.content_base64())
+        # One duplicate is unlinked while the other one is still cold
+        first_file._move_to_cold()
+        first_file.unlink()
+        cold_model._gc_cold_contents_batch()
+        self.assertEqual(store.get(checksum), b"\xff data")
+        # The content is deleted once it is not referenced anymore
+        second_file.unlink()
+        self.assertEqual(cold_model._gc_cold_contents_batch(), 1)
+        with self.assertRaises(FileNotFoundError):
+            store.get(checksum)
@@ -0,0 +1,71 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ZipStreamBuffer:
+    """
+    Write-only, non-seekable buffer used as the target of a ZipFile.
+
+    :class:`zipfile.ZipFile` falls back to data descriptors when the target
+    has no ``tell()``, so the archive can be produced without a temporary file
+    and drained chunk by chunk.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        """
+        Return and forget everything written since the last call.
+
+        :return: The pending bytes.
+        :rtype: bytes
+        """
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def zip_stream(entries, directories=(), chunk_size=CHUNK_SIZE):
+    """
+    Generate a ZIP archive on the fly.
+
+    :param iterable entries: Tuples ``(arcname, date_time, opener)`` where
+        ``opener`` is a callable returning a binary file object.
+    :param iterable directories: Folder names (ending with ``/``) to add
+        explicitly so that empty folders are kept in the archive.
+    :param int chunk_size: Size of the blocks read from each file.
+    :return: A generator of bytes chunks.
+    :rtype: generator
+    """
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", allowZip64=True) as archive:
+        for name in directories:
+            archive.writestr(zipfile.ZipInfo(name), b"")
+        for arcname, date_time, opener in entries:
+            info = zipfile.ZipInfo(arcname, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with opener() as source, archive.open(info, "w", force_zip64=True) as dest:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    data = buffer.pop()
+                    if data:
+                        yield data
+            data = buffer.pop()
+            if data:
+                yield data
+    yield buffer.pop()
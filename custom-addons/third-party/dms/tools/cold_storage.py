@@ -0,0 +1,84 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import gzip
+import os
+import tempfile
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+
+class LocalColdStore:
+    """
+    Cold contents kept as gzip files in a local directory.
+
+    Contents are named after their checksum and spread in sub-folders like the
+    filestore.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _full_path(self, key):
+        return os.path.join(self.path, key[:2], f"{key}.gz")
+
+    def put(self, key, data):
+        full_path = self._full_path(key)
+        folder = os.path.dirname(full_path)
+        os.makedirs(folder, exist_ok=True)
+        # Written aside then renamed so that a content is never half written
+        handle, tmp_path = tempfile.mkstemp(dir=folder)
+        try:
+            with os.fdopen(handle, "wb") as output:
+                output.write(gzip.compress(data))
+            os.replace(tmp_path, full_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, key):
+        with gzip.open(self._full_path(key), "rb") as source:
+            return source.read()
+
+    def delete(self, key):
+        try:
+            os.unlink(self._full_path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3ColdStore:
+    """
+    Cold contents kept as gzip objects in an S3 compatible bucket.
+
+    Any endpoint speaking the S3 protocol can be used, e.g. a MinIO server.
+    """
+
+    def __init__(self, endpoint, bucket, access_key=None, secret_key=None):
+        if boto3 is None:
+            raise ImportError("The boto3 library is required for S3 cold storage.")
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+        )
+
+    def put(self, key, data):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=f"{key}.gz",
+            Body=gzip.compress(data),
+            ContentEncoding="gzip",
+        )
+
+    def get(self, key):
+        response = self.client.get_object(Bucket=self.bucket, Key=f"{key}.gz")
+        return gzip.decompress(response["Body"].read())
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=f"{key}.gz")
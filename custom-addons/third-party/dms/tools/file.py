@@ -6,28 +6,30 @@
 import mimetypes
 import os
 import re
-import shutil
-import tempfile
 
 from odoo.tools.mimetypes import guess_mimetype
 
+SUFFIX = re.compile(r"\((\d+)\)(\.\w+)?$")
+NAME_MAX_BYTES = 255
+
 
 def check_name(name):
     """
     Check if a file name is valid.
 
+    The name must be usable as a single path component on the filesystem:
+    not empty, not ``.`` or ``..``, without separators or null characters and
+    at most 255 bytes long once encoded.
+
     :param str name: The file name to check.
     :return: True if the file name is valid, False otherwise.
     :rtype: bool
     """
-    tmp_dir = tempfile.mkdtemp()
-    try:
-        open(os.path.join(tmp_dir, name), "a").close()
-    except OSError:
+    if not name or name in (".", ".."):
         return False
-    finally:
-        shutil.rmtree(tmp_dir)
-    return True
+    if "/" in name or "\0" in name:
+        return False
+    return len(name.encode("utf-8", "surrogatepass")) <= NAME_MAX_BYTES
 
 
 def compute_name(name, suffix, escape_suffix):
@@ -65,8 +67,7 @@ def unique_name(name, names, escape_suffix=False):
     # Extract the suffix from the name
     # e.g: "file(1).txt" -> "1"
     #      "Directory (1)(2)" -> "2"
-    digits = re.compile(r"\((\d+)\)(\.\w+)?$")
-    match = digits.search(name)
+    match = SUFFIX.search(name)
     suffix = 1
     if match:
         suffix = int(match.group(1)) + 1
@@ -83,6 +84,27 @@ def unique_name(name, names, escape_suffix=False):
     return name
 
 
+def unique_name_prefix(name, escape_suffix=False):
+    """
+    Get the part of a name kept by :func:`unique_name`.
+
+    Every name generated from ``name`` starts with this prefix, so that the
+    candidates for a collision can be looked up with a single ``LIKE``.
+
+    :param str name: The original name.
+    :param bool escape_suffix: If True, the suffix is added in between the name and
+    the file extension.
+    :return: The prefix, e.g: "file(1).txt" -> "file".
+    :rtype: str
+    """
+    match = SUFFIX.search(name)
+    if match:
+        return name[: match.span()[0]]
+    if escape_suffix:
+        return os.path.splitext(name)[0]
+    return name
+
+
 def guess_extension(filename=None, mimetype=None, binary=None):
     """
     Guess the extension of a file.
@@ -0,0 +1,54 @@
+# Copyright 2025 ISIC Rabat
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha1_source(source, chunk_size=CHUNK_SIZE):
+    """
+    Compute the SHA1 of a content.
+
+    :param source: The path of a file, the bytes of the content or a callable
+        returning them. The callable must not use the environment, it is run
+        outside of the request thread.
+    :param int chunk_size: Size of the blocks read from the files.
+    :return: The hexadecimal digest, ``None`` when the file does not exist.
+    :rtype: str
+    """
+    if callable(source):
+        source = source()
+    if isinstance(source, str):
+        digest = hashlib.sha1()
+        try:
+            with open(source, "rb") as content:
+                while chunk := content.read(chunk_size):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            return None
+        return digest.hexdigest()
+    return hashlib.sha1(source or b"").hexdigest()
+
+
+def sha1_sources(sources, max_workers=None):
+    """
+    Compute the SHA1 of many contents in a thread pool.
+
+    Reading the files and hashing release the GIL, so the contents are
+    streamed in parallel.
+
+    :param dict sources: Mapping of keys to the sources accepted by
+        :func:`sha1_source`.
+    :param int max_workers: Number of threads, defaults to the number of CPUs.
+    :return: Mapping of the keys to the digests.
+    :rtype: dict
+    """
+    if not sources:
+        return {}
+    max_workers = max_workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        digests = executor.map(sha1_source, sources.values())
+        return dict(zip(sources, digests, strict=True))
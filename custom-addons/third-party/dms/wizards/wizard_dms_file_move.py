@@ -22,4 +22,4 @@ class WizardDmsFileMove(models.TransientModel):
 
     def process(self):
         items = self.env["dms.file"].browse(self.env.context.get("active_ids"))
-        items.write({"directory_id": self.directory_id})
+        items._move_to_directory(self.directory_id)
@@ -2,9 +2,10 @@
 # Copyright 2025 Simone Rubino - PyTech
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+from collections import Counter
+
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
-from odoo.osv import expression
 
 
 class DmsAccessGroups(models.Model):
@@ -52,14 +53,18 @@ class DmsAccessGroups(models.Model):
 
     @api.constrains("dms_field_ref")
     def _check_dms_field_ref(self):
-        for item in self.filtered("dms_field_ref"):
-            domain = expression.AND(
-                [
-                    item._get_domain_for_item_from_dms_field_ref(item.dms_field_ref),
-                    [("id", "!=", item.id)],
-                ]
+        refs = {
+            f"{item.dms_field_ref._name},{item.dms_field_ref.id}"
+            for item in self.filtered("dms_field_ref")
+        }
+        if not refs:
+            return
+        # Checked with one query for the groups created in batch
+        groups = self.search([("dms_field_ref", "in", list(refs))])
+        counts = Counter(
+            f"{group.dms_field_ref._name},{group.dms_field_ref.id}" for group in groups
+        )
+        if any(count > 1 for count in counts.values()):
+            raise UserError(
+                _("There is already an access group created for this record.")
             )
-            if self.search(domain):
-                raise UserError(
-                    _("There is already an access group created for this record.")
-                )
@@ -35,6 +35,7 @@ class DmsDirectory(models.Model):
 
     @api.constrains("res_id", "is_root_directory", "storage_id", "res_model")
     def _check_resource(self):
+        linked = self.browse()
         for directory in self:
             if directory.storage_id.save_type == "attachment":
                 continue
@@ -46,20 +47,28 @@ class DmsDirectory(models.Model):
                 raise ValidationError(
                     _("Directories of this storage must be related to a record")
                 )
-            if not directory.res_id:
-                continue
-            if self.search(
-                [
-                    ("storage_id", "=", directory.storage_id.id),
-                    ("id", "!=", directory.id),
-                    ("res_id", "=", directory.res_id),
-                    ("res_model", "=", directory.res_model),
-                ],
-                limit=1,
-            ):
-                raise ValidationError(
-                    _("This record is already related in this storage")
-                )
+            if directory.res_id:
+                linked |= directory
+        if not linked:
+            return
+        # Checked with one query for the directories created in batch
+        duplicates = self._read_group(
+            [
+                ("storage_id", "in", linked.storage_id.ids),
+                ("res_model", "in", list(set(linked.mapped("res_model")))),
+                ("res_id", "in", linked.mapped("res_id")),
+            ],
+            ["storage_id", "res_model", "res_id"],
+            having=[("__count", ">", 1)],
+        )
+        keys = {
+            (storage.id, res_model, res_id) for storage, res_model, res_id in duplicates
+        }
+        if any(
+            (directory.storage_id.id, directory.res_model, directory.res_id) in keys
+            for directory in linked
+        ):
+            raise ValidationError(_("This record is already related in this storage"))
 
     @api.model
     def _build_documents_view_directory(self, directory):
@@ -62,9 +62,12 @@ class DMSFieldMixin(models.AbstractModel):
             and not self.env.context.get("skip_track_dms_field_template")
             and self._name in self.models_to_track_dms_field_template()
         ):
-            template = self.env["dms.field.template"].with_context(res_model=self._name)
-            for item in result:
-                template.with_context(res_id=item.id).create_dms_directory()
+            template = self.env["dms.field.template"]._get_template_from_model(
+                self._name
+            )
+            template.sudo().with_context(res_model=self._name)._create_dms_directories(
+                result
+            )
         return result
 
     def write(self, vals):
@@ -97,28 +97,41 @@ class DmsFieldTemplate(models.Model):
         template = self._get_template_from_model(res_model).sudo()
         if not template:
             raise ValidationError(_("There is no template linked to this model"))
-        total_directories = directory_model.search_count(
+        return template._create_dms_directories(record)
+
+    def _create_dms_directories(self, records):
+        """Create the directories linked to many records and their
+        subdirectories.
+
+        The names are rendered at once and the directories, access groups and
+        files are created in a few batches whatever the number of records.
+
+        :param records: Records of the model of the template.
+        :return: The new root directories, in the order of the records.
+        """
+        self.ensure_one()
+        directory_model = self.env["dms.directory"].sudo()
+        if directory_model.search_count(
             [
                 ("parent_id", "=", self.parent_directory_id.id),
-                ("res_model", "=", res_model),
-                ("res_id", "=", res_id),
-            ]
-        )
-        if total_directories > 0:
+                ("res_model", "=", records._name),
+                ("res_id", "in", records.ids),
+            ],
+            limit=1,
+        ):
             raise ValidationError(_("There is already a linked directory created."))
-        # Create root directory + files
-        dms_directory_ids = template.dms_directory_ids
-        new_directory = directory_model.create(
-            template._prepare_directory_vals(dms_directory_ids, record)
+        # Create root directories + files
+        dms_directory_ids = self.dms_directory_ids
+        new_directories = directory_model.create(
+            self._prepare_directories_vals(dms_directory_ids, records)
         )
-        self._copy_files_from_directory(dms_directory_ids, new_directory)
+        self._copy_files_from_directory(dms_directory_ids, new_directories)
         # Create child directories
-        self._create_child_directories(new_directory, dms_directory_ids)
-        return new_directory
+        self._create_child_directories(new_directories, dms_directory_ids)
+        return new_directories
 
     def _copy_files_from_directory(self, directory, new_directory):
-        for file in directory.file_ids:
-            file.copy({"directory_id": new_directory.id})
+        directory.file_ids._copy_to_directories(new_directory)
 
     def _prepare_autogenerated_group(self, record):
         group_name = _("Autogenerated group from %(model)s (%(name)s) #%(id)s") % {
@@ -150,13 +163,30 @@ class DmsFieldTemplate(models.Model):
         The permissions of the auto-generated group should be changed
         to make sure you have the correct data.
         """
+        return self._get_autogenerated_groups(record)[record.id]
+
+    def _get_autogenerated_groups(self, records):
+        """Get the existing auto-generated groups of the records and create the
+        missing ones in one batch.
+
+        :return: Mapping of the record ids to their group.
+        :rtype: dict
+        """
         group_model = self.env["dms.access.group"]
-        group_ref = group_model._get_item_from_dms_field_ref(record)
-        if group_ref:
-            group_ref.write(self._prepare_autogenerated_group(record))
-            return group_ref
-        # Create the autogenerated group linked to the record
-        return group_model.create(self._prepare_autogenerated_group(record))
+        result = {}
+        existing = group_model.search(
+            [("dms_field_ref", "in", [f"{records._name},{id_}" for id_ in records.ids])]
+        )
+        for group in existing:
+            record = group.dms_field_ref
+            group.write(self._prepare_autogenerated_group(record))
+            result[record.id] = group
+        missing = records.filtered(lambda rec: rec.id not in result)
+        groups = group_model.create(
+            [self._prepare_autogenerated_group(record) for record in missing]
+        )
+        result.update(zip(missing.ids, groups, strict=True))
+        return result
 
     def _prepare_child_directory_vals(self, parent, template_child_directory):
         """Values to create child directories on the record.
@@ -176,11 +206,17 @@ class DmsFieldTemplate(models.Model):
         }
 
     def _create_child_directories(self, parent, directory):
-        """Create child directories from template subdirectory_ids."""
+        """Create child directories from template subdirectory_ids.
+
+        :param parent: Directories created from the template, each of them
+            receives the whole structure.
+        :param directory: Root directory of the template.
+        """
         directory_model = self.env["dms.directory"].sudo()
-        template = self._get_template_from_model(
+        template = self or self._get_template_from_model(
             self.env.context.get("res_model", "")
-        ).sudo()
+        )
+        template = template.sudo()
         # Use subdirectory_ids from the template if available
         children = template.subdirectory_ids if template else self.env["dms.directory"]
         if not children:
@@ -188,36 +224,54 @@ class DmsFieldTemplate(models.Model):
             children = directory.child_directory_ids.filtered(
                 lambda d: d.res_model == "dms.field.template" or not d.res_model
             )
-        for child_directory in children:
-            child = directory_model.create(
-                self._prepare_child_directory_vals(parent, child_directory)
+        new_children = directory_model.create(
+            [
+                self._prepare_child_directory_vals(new_parent, child_directory)
+                for child_directory in children
+                for new_parent in parent
+            ]
+        )
+        for index, child_directory in enumerate(children):
+            self._copy_files_from_directory(
+                child_directory,
+                new_children[index * len(parent) : (index + 1) * len(parent)],
             )
-            self._copy_files_from_directory(child_directory, child)
 
     def _prepare_directory_vals(self, directory, record):
-        # Groups of the new directory will be those of the template + auto-generate
-        groups = directory.group_ids
-        groups += self._get_autogenerated_group(record)
-        directory_name = self.env["mail.render.mixin"]._render_template(
+        return self._prepare_directories_vals(directory, record)[0]
+
+    def _prepare_directories_vals(self, directory, records):
+        # Groups of the new directories will be those of the template +
+        # auto-generated
+        groups = self._get_autogenerated_groups(records)
+        directory_names = self.env["mail.render.mixin"]._render_template(
             self.directory_format_name,
-            record._name,
-            record.ids,
+            records._name,
+            records.ids,
             engine="inline_template",
-        )[record.id]
-        vals = {
-            "storage_id": directory.storage_id.id,
-            "res_id": record.id,
-            "res_model": record._name,
-            "name": directory_name,
-            "group_ids": [(4, group.id) for group in groups],
-        }
-        if not self.parent_directory_id:
-            vals.update({"is_root_directory": True})
-        else:
-            vals.update(
-                {"parent_id": self.parent_directory_id.id, "inherit_group_ids": False}
-            )
-        return vals
+        )
+        vals_list = []
+        for record in records:
+            vals = {
+                "storage_id": directory.storage_id.id,
+                "res_id": record.id,
+                "res_model": record._name,
+                "name": directory_names[record.id],
+                "group_ids": [
+                    (4, group.id) for group in directory.group_ids + groups[record.id]
+                ],
+            }
+            if not self.parent_directory_id:
+                vals.update({"is_root_directory": True})
+            else:
+                vals.update(
+                    {
+                        "parent_id": self.parent_directory_id.id,
+                        "inherit_group_ids": False,
+                    }
+                )
+            vals_list.append(vals)
+        return vals_list
 
     @api.constrains("model_id")
     def _check_model_id(self):
@@ -2,6 +2,8 @@
 # Copyright 2024 Tecnativa - Víctor Martínez
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import base64
+
 from odoo.exceptions import UserError, ValidationError
 from odoo.tests import new_test_user
 from odoo.tools import mute_logger
@@ -251,6 +253,31 @@ class TestDmsField(BaseCommon):
             partner_1.dms_directory_ids.name, f"{partner_1.name}-{partner_1.ref}"
         )
 
+    def test_creation_process_batch(self):
+        template_file = self.env["dms.file"].create(
+            {
+                "name": "template.txt",
+                "directory_id": self.subdirectory_1.id,
+                "content": base64.b64encode(b"template content"),
+            }
+        )
+        partners = self.env["res.partner"].create(
+            [{"name": f"Batch partner {index}"} for index in range(3)]
+        )
+        partners.invalidate_model()
+        directories = partners.dms_directory_ids
+        self.assertEqual(len(directories), 3)
+        self.assertEqual(directories.mapped("name"), partners.mapped("display_name"))
+        groups = directories.group_ids.filtered("dms_field_ref")
+        self.assertEqual(len(groups), 3)
+        children = directories.child_directory_ids
+        self.assertEqual(len(children), 6)
+        files = children.file_ids
+        self.assertEqual(len(files), 3)
+        self.assertEqual(set(files.mapped("name")), {template_file.name})
+        self.assertEqual(files.blob_id, template_file.blob_id)
+        self.assertEqual(set(files.mapped("mimetype")), {template_file.mimetype})
+
     def test_parents(self):
         directory = self.env["dms.directory"].create(
             self._create_directory_vals(self.partner)